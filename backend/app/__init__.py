@@ -1,9 +1,19 @@
 import os
-from flask import Flask
+from flask import Flask, Request, current_app
 from flask_cors import CORS
 from dotenv import load_dotenv
 
 from app.extension import db, migrate
+from app.utils import ai_client
+from app.utils.answer_cache import answer_cache
+from app.utils.vector_index import vector_index
+from app.utils.storage import storage
+from app.utils.previews import preview_cache
+from app.utils.notes_index import notes_index
+from app.utils.auth_cache import auth_cache
+from app.utils.password_hasher import password_hasher
+from app.utils.jwt_utils import reset_current_user
+from app.cli import register_cli
 from app.routes.auth_routes import auth_bp
 from app.routes.file_routes import files_bp
 from app.routes.chat_routes import chat_bp
@@ -17,11 +27,27 @@ from app.routes.event import event_bp
 
 load_dotenv()
 
+
+class AppRequest(Request):
+    @property
+    def max_content_length(self):
+        # a bulk upload carries a whole course at once
+        if self.endpoint == "files.bulk_upload":
+            return current_app.config["BULK_UPLOAD_MAX_SIZE"]
+        return super().max_content_length
+
+
 def create_app():
     app = Flask(__name__, instance_relative_config=False)
+    app.request_class = AppRequest
     app.config.from_object("config.Config")
 
-    CORS(app, supports_credentials=True, origins=["https://nebulalearn-studio.vercel.app"])
+    CORS(
+        app,
+        supports_credentials=True,
+        origins=["https://nebulalearn-studio.vercel.app"],
+        expose_headers=["X-Next-Cursor"]
+    )
 
 
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -31,6 +57,16 @@ def create_app():
     # init extensions
     db.init_app(app)
     migrate.init_app(app, db)
+    ai_client.init_app(app)
+    answer_cache.init_app(app)
+    vector_index.init_app(app)
+    storage.init_app(app)
+    preview_cache.init_app(app)
+    notes_index.init_app(app)
+    auth_cache.init_app(app)
+    password_hasher.init_app(app)
+    register_cli(app)
+    app.before_request(reset_current_user)
 
     # register blueprints
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
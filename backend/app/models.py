@@ -1,6 +1,6 @@
 from datetime import datetime, date
-from werkzeug.security import generate_password_hash, check_password_hash
 from app.extension import db
+from app.utils.password_hasher import password_hasher
 
 
 class User(db.Model):
@@ -13,15 +13,26 @@ class User(db.Model):
     role = db.Column(db.String(20), nullable=False, default="student")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # both hash in password_hasher's pool and may raise HasherBusy
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """Also swaps in a fresh hash if PASSWORD_HASH_METHOD changed (caller commits)."""
+        matches, upgraded = password_hasher.verify(self.password_hash, password)
+        if upgraded:
+            self.password_hash = upgraded
+        return matches
 
 
 class File(db.Model):
     __tablename__ = "file"
+    # keyset pages of the notes list: a teacher's own files, or everyone's,
+    # newest first
+    __table_args__ = (
+        db.Index("ix_file_uploaded_by_uploaded_at", "uploaded_by", "uploaded_at", "id"),
+        db.Index("ix_file_uploaded_at", "uploaded_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(512), nullable=False)
@@ -31,8 +42,70 @@ class File(db.Model):
     uploaded_by = db.Column(db.Integer, db.ForeignKey("user.id"))
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    content_text = db.Column(db.Text)
+    # legacy single-blob text; extracted text now lives in FilePage.
+    # Deferred so File queries never pull it in unless asked for.
+    content_text = db.deferred(db.Column(db.Text))
+    # sha256 of the stored bytes; identical uploads share one StoredBlob
+    content_hash = db.Column(db.String(64), index=True)
+
+    # background text extraction: pending -> done | failed
+    extraction_status = db.Column(db.String(20), nullable=False, default="done", server_default="done")
+    extraction_attempts = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    extraction_error = db.Column(db.Text)
+    extracted_at = db.Column(db.DateTime)
     user = db.relationship("User", backref=db.backref("files", lazy="dynamic"))
+    pages = db.relationship(
+        "FilePage",
+        order_by="FilePage.page_number",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+
+
+class FilePage(db.Model):
+    __tablename__ = "file_page"
+
+    file_id = db.Column(db.Integer, db.ForeignKey("file.id", ondelete="CASCADE"), primary_key=True)
+    # 1-based, as shown in PDF viewers
+    page_number = db.Column(db.Integer, primary_key=True)
+    text = db.Column(db.Text, nullable=False, default="")
+    char_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class UploadSession(db.Model):
+    """A resumable upload in progress; finalizing it creates the File."""
+    __tablename__ = "upload_session"
+
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    filename = db.Column(db.String(512), nullable=False)
+    mimetype = db.Column(db.String(255))
+    # declared total size and bytes committed so far
+    size = db.Column(db.BigInteger, nullable=False)
+    received = db.Column(db.BigInteger, nullable=False, default=0)
+    temp_path = db.Column(db.String(1024), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class StoredBlob(db.Model):
+    __tablename__ = "stored_blob"
+
+    content_hash = db.Column(db.String(64), primary_key=True)
+    storage_path = db.Column(db.String(1024), nullable=False)
+    size = db.Column(db.Integer)
+    # number of File rows pointing at this blob
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ExtractedText(db.Model):
+    __tablename__ = "extracted_text"
+
+    content_hash = db.Column(db.String(64), primary_key=True)
+    extractor_version = db.Column(db.String(32), primary_key=True)
+    text = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
 class Attendance(db.Model):
@@ -50,8 +123,26 @@ class Event(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey("user.id"))
 
 class ChatHistory(db.Model):
+    # serves per-user history pages and the memory seed query in
+    # newest-first (created_at, id) keyset order
+    __table_args__ = (
+        db.Index("ix_chat_history_user_id_created_at", "user_id", "created_at", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
     question = db.Column(db.Text)
     answer = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class ChatMemory(db.Model):
+    __tablename__ = "chat_memory"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    # condensed older exchanges, one line per turn
+    summary = db.Column(db.Text, nullable=False, default="")
+    # last few raw exchanges as a JSON list of [question, answer]
+    recent_turns = db.Column(db.Text, nullable=False, default="[]")
+    turn_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
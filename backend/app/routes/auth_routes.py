@@ -1,4 +1,9 @@
-from flask import Blueprint, request, jsonify
+import csv
+import io
+import shutil
+import tempfile
+
+from flask import Blueprint, request, jsonify, current_app
 from ..models import db, User
 from ..utils.jwt_utils import (
     create_access_token,
@@ -8,10 +13,21 @@ from ..utils.jwt_utils import (
 from app.extension import db
 from app.models import User
 from ..utils.admin_middleware import admin_required
+from ..utils.auth_cache import auth_cache
+from ..utils.password_hasher import HasherBusy
+from ..utils.user_import import count_rows, import_users
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
 
+@auth_bp.errorhandler(HasherBusy)
+def hasher_busy(e):
+    # hashing pool backlog is full: shed load fast instead of queueing
+    response = jsonify({"error": "too many sign-ins right now, please retry shortly"})
+    response.headers["Retry-After"] = str(current_app.config.get("PASSWORD_HASH_RETRY_AFTER", 2))
+    return response, 503
+
+
 # ----------------------------
 # REGISTER (Student + Teacher)
 # ----------------------------
@@ -80,6 +96,10 @@ def login():
     if not user or not user.check_password(password):
         return jsonify({"error": "invalid credentials"}), 401
 
+    # hash re-made with the current PASSWORD_HASH_METHOD
+    if db.session.is_modified(user):
+        db.session.commit()
+
     token = create_access_token({
         "sub": user.id,
         "role": user.role,
@@ -129,6 +149,51 @@ def get_all_users():
         for u in users
     ]), 200
 
+# ----------------------------
+# ADMIN: IMPORT USERS FROM CSV
+#
+# multipart "file" or a text/csv body with columns
+# name,email,password[,role]; ?role= sets the default role.
+# Runs inside the request, so it is capped at USER_IMPORT_MAX_ROWS
+# (what the hash pool gets through well within the worker timeout);
+# larger cohorts go through `flask users import <file>`.
+# ----------------------------
+@auth_bp.route("/users/import", methods=["POST"])
+@token_required
+@admin_required
+def import_users_csv():
+    upload = request.files.get("file")
+    if upload:
+        raw = upload.stream
+    else:
+        # counting the rows first needs a rewindable copy of the body
+        raw = tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024)
+        shutil.copyfileobj(request.stream, raw)
+        raw.seek(0)
+    stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+
+    max_rows = current_app.config.get("USER_IMPORT_MAX_ROWS", 200)
+    try:
+        # refuse before anything is committed rather than time out halfway
+        rows = count_rows(stream)
+        if rows > max_rows:
+            return jsonify({
+                "error": f"CSV has {rows} rows; imports over {max_rows} rows "
+                         "must be run with `flask users import <file>`",
+                "max_rows": max_rows
+            }), 413
+
+        report = import_users(
+            stream,
+            batch_size=current_app.config.get("USER_IMPORT_BATCH_SIZE", 500),
+            default_role=request.args.get("role", "student")
+        )
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"error": f"invalid CSV: {e}"}), 400
+
+    # partial import: the report says which rows were committed
+    return jsonify(report), 500 if "aborted" in report else 200
+
 # ----------------------------
 # ADMIN: CHANGE ROLE
 # ----------------------------
@@ -153,6 +218,7 @@ def change_role(user_id):
 
     user.role = new_role
     db.session.commit()
+    auth_cache.invalidate_user(user.id)
 
     return jsonify({
         "message": "role updated successfully",
@@ -1,30 +1,134 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 
-from sqlalchemy import or_
-import re
+import base64
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.exc import IntegrityError
 from app.extension import db
-from app.models import File, User, ChatHistory
-from app.utils.jwt_utils import decode_token
-from app.utils.ai_client import ask_ai
+from app.models import ChatHistory
+from app.utils.jwt_utils import get_current_user, token_required, admin_required
+from app.utils.ai_client import ask_ai, ask_ai_stream, AIStreamInterrupted, AI_UNAVAILABLE_MESSAGE
+from app.utils.answer_cache import answer_cache
+from app.utils.search_index import SearchHit, passage_index
+from app.utils.vector_index import vector_index
+from app.utils.query_analyzer import normalize_question
+from app.utils.context_builder import build_context
+from app.utils.chat_memory import format_memory, load_memory, record_turn
 
 chat_bp = Blueprint("chat", __name__, url_prefix="/api/chat")
 
 
 
 # --------------------------------------------------
-# Helper: get current user from JWT
+# Helper: memory, retrieval and cache lookup shared by
+# the plain, streaming and batch ask endpoints
 # --------------------------------------------------
-def get_current_user(req):
-    auth = req.headers.get("Authorization")
-    if not auth or not auth.startswith("Bearer "):
-        return None
+def prepare_questions(user, raw_questions):
+    search_queries = [normalize_question(q) for q in raw_questions]
 
-    token = auth.split(" ")[1]
-    payload = decode_token(token)
-    if not payload:
-        return None
+    print("RAW QUESTIONS:", raw_questions)
+    print("SEARCH QUERIES:", search_queries)
 
-    return User.query.get(payload.get("sub"))
+    # --------------------------------------------------
+    # CONVERSATION MEMORY (SUMMARY + LAST RAW TURNS)
+    # --------------------------------------------------
+    memory = load_memory(user.id) if user else ("", [])
+    history = format_memory(*memory)
+
+    # --------------------------------------------------
+    # SEARCH PASSAGE INDEX
+    # --------------------------------------------------
+    passage_index.sync()
+    k = current_app.config.get("CHAT_CANDIDATE_PASSAGES", 20)
+    all_hits = [passage_index.search(q, k) for q in search_queries]
+
+    # --------------------------------------------------
+    # ADD PARAPHRASE MATCHES + RERANK BY TF-IDF SIMILARITY
+    # --------------------------------------------------
+    if vector_index.available:
+        min_similarity = current_app.config.get("CHAT_VECTOR_MIN_SIMILARITY", 0.15)
+        vector_results = vector_index.search_batch(
+            search_queries, current_app.config.get("CHAT_VECTOR_CANDIDATES", 10)
+        )
+
+        for n, (search_query, hits) in enumerate(zip(search_queries, all_hits)):
+            seen = {(h.passage.file_id, h.passage.start) for h in hits}
+            for file_id, start, _, similarity in vector_results[n]:
+                if similarity < min_similarity:
+                    continue
+                # the keyword index is the source of truth for live passages,
+                # which also drops files deleted since the last vector build
+                passage = passage_index.passage_at(file_id, start)
+                if passage is not None and (file_id, start) not in seen:
+                    hits.append(SearchHit(passage, 0.0))
+
+            all_hits[n] = vector_index.rerank(
+                search_query, hits, current_app.config.get("CHAT_KEYWORD_WEIGHT", 0.5)
+            )
+
+    # --------------------------------------------------
+    # PACK BEST PASSAGES INTO THE TOKEN BUDGET
+    # (empty context = AI fallback, no document found)
+    # --------------------------------------------------
+    prepared = []
+    for search_query, hits in zip(search_queries, all_hits):
+        context, passages = build_context(
+            hits, current_app.config.get("CHAT_CONTEXT_TOKENS", 1200)
+        )
+        prepared.append({
+            "history": history,
+            "memory": memory,
+            "context": context,
+            "sources": list(dict.fromkeys(p["filename"] for p in passages)),
+            "passages": passages,
+            "cache_key": answer_cache.make_key(
+                search_query, (p["file_id"] for p in passages), bool(history)
+            ),
+        })
+
+    return prepared
+
+
+def prepare_question(user, raw_question):
+    return prepare_questions(user, [raw_question])[0]
+
+
+def remember_answer(prepared, answer):
+    if answer != AI_UNAVAILABLE_MESSAGE:
+        answer_cache.put(prepared["cache_key"], {"answer": answer})
+
+
+def save_chats(user, exchanges, memory=None):
+    """Store (question, answer) pairs with one bulk insert and commit.
+
+    ``memory`` is the prepared questions' memory, used to seed the
+    memory row of a user who does not have one yet.
+    """
+    if not user or not exchanges:
+        return
+
+    rows = [
+        {"user_id": user.id, "question": q, "answer": a, "created_at": datetime.utcnow()}
+        for q, a in exchanges
+    ]
+    db.session.execute(insert(ChatHistory), rows)
+    for question, answer in exchanges:
+        record_turn(user.id, question, answer, seed=memory)
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # a concurrent request created this user's memory row first;
+        # keep the history rows and let the next turn update memory
+        db.session.rollback()
+        db.session.execute(insert(ChatHistory), rows)
+        db.session.commit()
+
+
+def save_chat(user, question, answer, memory=None):
+    save_chats(user, [(question, answer)], memory)
 
 
 # --------------------------------------------------
@@ -33,15 +137,11 @@ def get_current_user(req):
 @chat_bp.route("/ask", methods=["POST"])
 def ask():
     try:
-        user = get_current_user(request)
+        user = get_current_user()
         print("USER:", user)
 
         data = request.get_json() or {}
         raw_question = data.get("question", "").strip()
-        search_query = normalize_question(raw_question)
-
-        print("RAW QUESTION:", raw_question)
-        print("SEARCH QUERY:", search_query)
 
         if not raw_question:
             return jsonify({
@@ -49,83 +149,33 @@ def ask():
                 "sources": []
             }), 400
 
-        # --------------------------------------------------
-        # GET LAST 5 CHAT HISTORY (MEMORY)
-        # --------------------------------------------------
-        history = ""
-        if user:
-            chats = ChatHistory.query.filter_by(user_id=user.id)\
-                .order_by(ChatHistory.created_at.desc())\
-                .limit(5).all()
-
-            chats.reverse()
-
-            for c in chats:
-                history += f"User: {c.question}\nAssistant: {c.answer}\n"
+        prepared = prepare_question(user, raw_question)
 
         # --------------------------------------------------
-        # SEARCH DOCUMENT DATABASE
+        # ANSWER CACHE
         # --------------------------------------------------
-        results = File.query.filter(
-            or_(
-                File.filename.ilike(f"%{search_query}%"),
-                File.content_text.ilike(f"%{search_query}%")
-            )
-        ).limit(3).all()
+        cached = answer_cache.get(prepared["cache_key"])
 
-        # --------------------------------------------------
-        # AI FALLBACK (NO DOCUMENT FOUND)
-        # --------------------------------------------------
-        if not results:
-            ai_answer = ask_ai(raw_question, "", history)
-            print("AI FALLBACK ANSWER:", ai_answer)
-
-            # SAVE CHAT HISTORY
-            if user:
-                chat = ChatHistory(
-                    user_id=user.id,
-                    question=raw_question,
-                    answer=ai_answer
-                )
-                db.session.add(chat)
-                db.session.commit()
-
-            return jsonify({
-                "answer": ai_answer,
-                "sources": []
-            })
-
-        # --------------------------------------------------
-        # BUILD CONTEXT FROM FILES
-        # --------------------------------------------------
-        context = "\n\n".join(
-            f"{f.filename}:\n{(f.content_text or '')[:1500]}"
-            for f in results
-        )
-
-        # --------------------------------------------------
-        # SEND CONTEXT + MEMORY TO AI
-        # --------------------------------------------------
-        full_context = context + "\n\nConversation History:\n" + history
-
-        ai_answer = ask_ai(raw_question, context, history)
-        print("AI ANSWER:", ai_answer)
+        if cached is not None:
+            ai_answer = cached["answer"]
+            print("AI CACHED ANSWER:", ai_answer)
+        else:
+            # --------------------------------------------------
+            # SEND CONTEXT + MEMORY TO AI
+            # --------------------------------------------------
+            ai_answer = ask_ai(raw_question, prepared["context"], prepared["history"])
+            print("AI ANSWER:", ai_answer)
+            remember_answer(prepared, ai_answer)
 
         # --------------------------------------------------
         # SAVE CHAT HISTORY
         # --------------------------------------------------
-        if user:
-            chat = ChatHistory(
-                user_id=user.id,
-                question=raw_question,
-                answer=ai_answer
-            )
-            db.session.add(chat)
-            db.session.commit()
+        save_chat(user, raw_question, ai_answer, prepared["memory"])
 
         return jsonify({
             "answer": ai_answer,
-            "sources": [f.filename for f in results]
+            "sources": prepared["sources"],
+            "passages": prepared["passages"]
         })
 
     except Exception as e:
@@ -137,19 +187,247 @@ def ask():
 
 
 # --------------------------------------------------
-# QUESTION NORMALIZER
+# CHAT / ASK (STREAMING, SERVER-SENT EVENTS)
+#
+#   event: token    data: {"text": "..."}     (repeated)
+#   event: sources  data: {"sources": [...], "passages": [...]}
+#   event: done     data: {}
+#   event: error    data: {"answer": "...", "partial": bool}
+#                   (instead of sources/done; a partial answer is
+#                    neither cached nor saved to history)
 # --------------------------------------------------
-def normalize_question(question: str):
-    question = question.lower()
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-    command_words = [
-        "explain", "define", "describe", "tell", "tell me", "tell me about",
-        "what is", "what are", "can you explain", "can you tell",
-        "help me with", "give me", "show me"
-    ]
 
-    for cmd in command_words:
-        question = re.sub(rf"\b{cmd}\b", "", question, flags=re.IGNORECASE)
+@chat_bp.route("/ask/stream", methods=["POST"])
+def ask_stream():
+    user = get_current_user()
+    print("USER:", user)
+
+    data = request.get_json() or {}
+    raw_question = data.get("question", "").strip()
+
+    if not raw_question:
+        return jsonify({
+            "answer": "Please enter a question.",
+            "sources": []
+        }), 400
+
+    def generate():
+        try:
+            prepared = prepare_question(user, raw_question)
 
-    question = re.sub(r"\s+", " ", question).strip()
-    return question
\ No newline at end of file
+            cached = answer_cache.get(prepared["cache_key"])
+            if cached is not None:
+                ai_answer = cached["answer"]
+                yield sse_event("token", {"text": ai_answer})
+            else:
+                parts = []
+                for text in ask_ai_stream(raw_question, prepared["context"], prepared["history"]):
+                    parts.append(text)
+                    yield sse_event("token", {"text": text})
+
+                ai_answer = "".join(parts).strip()
+                print("AI STREAMED ANSWER:", ai_answer)
+                remember_answer(prepared, ai_answer)
+
+            save_chat(user, raw_question, ai_answer, prepared["memory"])
+
+            yield sse_event("sources", {
+                "sources": prepared["sources"],
+                "passages": prepared["passages"]
+            })
+            yield sse_event("done", {})
+
+        except AIStreamInterrupted:
+            yield sse_event("error", {
+                "answer": "The answer was interrupted. Please try again.",
+                "partial": True
+            })
+
+        except Exception as e:
+            print("CHAT STREAM ERROR:", e)
+            yield sse_event("error", {
+                "answer": "Something went wrong while processing your question.",
+                "partial": False
+            })
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # keep nginx from buffering the whole stream
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
+# --------------------------------------------------
+# CHAT / ASK MANY QUESTIONS AT ONCE
+#
+# {"questions": [...], "stream": false}
+#   -> {"results": [{"question", "answer", "sources", "passages"}, ...]}
+# with "stream": true answers arrive as NDJSON lines, tagged with their
+# "index", in the order they finish
+# --------------------------------------------------
+@chat_bp.route("/ask-batch", methods=["POST"])
+def ask_batch():
+    user = get_current_user()
+    print("USER:", user)
+
+    data = request.get_json() or {}
+    questions = data.get("questions")
+    limit = current_app.config.get("CHAT_BATCH_MAX_QUESTIONS", 50)
+
+    if not isinstance(questions, list) or not questions:
+        return jsonify({"error": "questions must be a non-empty list"}), 400
+    if len(questions) > limit:
+        return jsonify({"error": f"at most {limit} questions per batch"}), 400
+
+    questions = [str(q or "").strip() for q in questions]
+    if not all(questions):
+        return jsonify({"error": "questions must not be empty"}), 400
+
+    try:
+        prepared = prepare_questions(user, questions)
+    except Exception as e:
+        print("CHAT BATCH ERROR:", e)
+        return jsonify({"error": "Something went wrong while processing your questions."}), 500
+
+    def result(n, answer):
+        return {
+            "index": n,
+            "question": questions[n],
+            "answer": answer,
+            "sources": prepared[n]["sources"],
+            "passages": prepared[n]["passages"],
+        }
+
+    def answers():
+        """Yield (index, answer) as each one becomes available."""
+        pending = []
+        for n, p in enumerate(prepared):
+            cached = answer_cache.get(p["cache_key"])
+            if cached is not None:
+                yield n, cached["answer"]
+            else:
+                pending.append(n)
+
+        if not pending:
+            return
+
+        workers = min(len(pending), current_app.config.get("CHAT_BATCH_CONCURRENCY", 8))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(ask_ai, questions[n], prepared[n]["context"], prepared[n]["history"]): n
+                for n in pending
+            }
+            for future in as_completed(futures):
+                n = futures[future]
+                answer = future.result()
+                remember_answer(prepared[n], answer)
+                yield n, answer
+
+    if data.get("stream"):
+        def generate():
+            finished = {}
+            try:
+                for n, answer in answers():
+                    finished[n] = answer
+                    yield json.dumps(result(n, answer)) + "\n"
+            finally:
+                save_chats(user, [(questions[n], finished[n]) for n in sorted(finished)],
+                           prepared[0]["memory"])
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="application/x-ndjson",
+            headers={"X-Accel-Buffering": "no"}
+        )
+
+    finished = dict(answers())
+    save_chats(user, [(q, finished[n]) for n, q in enumerate(questions)], prepared[0]["memory"])
+
+    return jsonify({
+        "results": [result(n, finished[n]) for n in range(len(questions))]
+    })
+
+
+# --------------------------------------------------
+# CHAT HISTORY (KEYSET PAGINATION, NEWEST FIRST)
+#
+# GET /history?limit=20&cursor=<next_cursor>&q=<text>
+# --------------------------------------------------
+def encode_cursor(chat):
+    raw = json.dumps([chat.created_at.isoformat(), chat.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    created_at, chat_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(created_at), int(chat_id)
+
+
+@chat_bp.route("/history", methods=["GET"])
+def chat_history():
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+    except ValueError:
+        return jsonify({"error": "invalid limit"}), 400
+
+    query = ChatHistory.query.filter(ChatHistory.user_id == user.id)
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            created_at, chat_id = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            return jsonify({"error": "invalid cursor"}), 400
+
+        query = query.filter(or_(
+            ChatHistory.created_at < created_at,
+            and_(ChatHistory.created_at == created_at, ChatHistory.id < chat_id)
+        ))
+
+    text = request.args.get("q", "").strip()
+    if text:
+        pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        query = query.filter(or_(
+            ChatHistory.question.ilike(pattern, escape="\\"),
+            ChatHistory.answer.ilike(pattern, escape="\\")
+        ))
+
+    chats = query.order_by(ChatHistory.created_at.desc(), ChatHistory.id.desc())\
+        .limit(limit + 1).all()
+
+    has_more = len(chats) > limit
+    chats = chats[:limit]
+
+    return jsonify({
+        "items": [
+            {
+                "id": c.id,
+                "question": c.question,
+                "answer": c.answer,
+                "created_at": c.created_at.isoformat(),
+            }
+            for c in chats
+        ],
+        "next_cursor": encode_cursor(chats[-1]) if has_more else None
+    })
+
+
+# --------------------------------------------------
+# ANSWER CACHE STATS (ADMIN)
+# --------------------------------------------------
+@chat_bp.route("/cache/stats", methods=["GET"])
+@token_required
+@admin_required
+def cache_stats():
+    return jsonify(answer_cache.stats()), 200
@@ -1,61 +1,159 @@
+import base64
+import json
+import mimetypes
 import os
 import uuid
+import zipfile
+from datetime import datetime
 
 from flask import Blueprint, request, jsonify, current_app, send_file
 
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import load_only
 from werkzeug.utils import secure_filename
 
-from ..models import db, File, User
-from ..utils.jwt_utils import decode_token
-from ..utils.s3_utils import upload_to_s3, delete_from_s3
-from ..utils.text_extractor import extract_text_from_file
+from ..models import db, File, FilePage, UploadSession
+from ..utils.jwt_utils import get_current_user
+from ..utils.storage import storage
+from ..utils.previews import preview_cache, render_preview
+from ..utils.search_index import passage_index
+from ..utils.answer_cache import answer_cache
+from ..utils.blob_store import (
+    save_stream,
+    acquire_blob,
+    release_blob,
+    cached_extraction,
+)
+from ..utils.extraction_queue import complete_extraction, publish_extraction, enqueue
+from ..utils.upload_sessions import (
+    OffsetMismatch,
+    start_session,
+    append_chunk,
+    session_digest,
+    discard_session,
+    expire_sessions,
+)
 
 files_bp = Blueprint("files", __name__, url_prefix="/api/files")
 
 
 
 # --------------------------------------------------
-# Helper: get current user from JWT
+# LIST FILES (KEYSET PAGINATION)
+#
+# GET /?limit=50&cursor=<X-Next-Cursor>&sort=uploaded_at|filename|size
+#      &order=desc|asc&uploader=<id>&mimetype=a/b,c/d
+#      &uploaded_after=<iso>&uploaded_before=<iso>
+#
+# The body stays a plain list; the next page's cursor is returned in the
+# X-Next-Cursor header and is absent on the last page.
 # --------------------------------------------------
-def get_current_user():
-    auth = request.headers.get("Authorization")
-    if not auth or not auth.startswith("Bearer "):
-        return None
+FILE_SORTS = {
+    "uploaded_at": File.uploaded_at,
+    "filename": File.filename,
+    "size": func.coalesce(File.size, 0),
+}
 
-    token = auth.split(" ")[1]
-    payload = decode_token(token)
-    if not payload:
-        return None
 
-    return User.query.get(payload.get("sub"))
+def encode_file_cursor(sort, order, value, file_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, order, value, file_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_file_cursor(cursor, sort, order):
+    cursor_sort, cursor_order, value, file_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError("cursor belongs to a different sort")
+    if sort == "uploaded_at":
+        value = datetime.fromisoformat(value)
+    return value, int(file_id)
+
+
+def parse_datetime_arg(name):
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
 
 
-# --------------------------------------------------
-# LIST FILES
-# --------------------------------------------------
 @files_bp.route("/", methods=["GET"])
 def list_files():
     user = get_current_user()
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
 
-    files = (
-        File.query.filter_by(uploaded_by=user.id).all()
-        if user.role == "teacher"
-        else File.query.all()
-    )
+    sort = request.args.get("sort", "uploaded_at")
+    order = request.args.get("order", "desc")
+    if sort not in FILE_SORTS or order not in ("asc", "desc"):
+        return jsonify({"error": "invalid sort or order"}), 400
 
-    return jsonify([
+    try:
+        limit = min(max(int(request.args.get("limit", 50)), 1), 200)
+        uploader = request.args.get("uploader", type=int)
+        uploaded_after = parse_datetime_arg("uploaded_after")
+        uploaded_before = parse_datetime_arg("uploaded_before")
+    except ValueError:
+        return jsonify({"error": "invalid limit or date"}), 400
+
+    # only the listed columns; content_text is deferred on the model anyway
+    query = File.query.options(load_only(
+        File.id, File.filename, File.size, File.mimetype, File.uploaded_at
+    ))
+
+    if user.role == "teacher":
+        query = query.filter(File.uploaded_by == user.id)
+    if uploader is not None:
+        query = query.filter(File.uploaded_by == uploader)
+
+    mimetype_filter = [m for m in request.args.get("mimetype", "").split(",") if m]
+    if mimetype_filter:
+        query = query.filter(File.mimetype.in_(mimetype_filter))
+    if uploaded_after:
+        query = query.filter(File.uploaded_at >= uploaded_after)
+    if uploaded_before:
+        query = query.filter(File.uploaded_at < uploaded_before)
+
+    column = FILE_SORTS[sort]
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            value, file_id = decode_file_cursor(cursor, sort, order)
+        except (ValueError, TypeError):
+            return jsonify({"error": "invalid cursor"}), 400
+
+        if order == "desc":
+            query = query.filter(or_(column < value, and_(column == value, File.id < file_id)))
+        else:
+            query = query.filter(or_(column > value, and_(column == value, File.id > file_id)))
+
+    if order == "desc":
+        query = query.order_by(column.desc(), File.id.desc())
+    else:
+        query = query.order_by(column.asc(), File.id.asc())
+
+    files = query.limit(limit + 1).all()
+    has_more = len(files) > limit
+    files = files[:limit]
+
+    response = jsonify([
         {
             "id": f.id,
             "filename": f.filename,
             "size": f.size,
+            "mimetype": f.mimetype,
             "uploaded_at": f.uploaded_at.isoformat(),
-            "download_url": f"/api/files/{f.id}/download"
+            "download_url": f"/api/files/{f.id}/download",
+            "preview_url": f"/api/files/{f.id}/preview" if is_pdf(f) else None
         }
         for f in files
     ])
 
+    if has_more:
+        last = files[-1]
+        value = {"uploaded_at": last.uploaded_at, "filename": last.filename, "size": last.size or 0}[sort]
+        response.headers["X-Next-Cursor"] = encode_file_cursor(sort, order, value, last.id)
+    return response
+
 
 # --------------------------------------------------
 # UPLOAD FILE (TEACHER ONLY)
@@ -80,36 +178,386 @@ def upload_file():
         return jsonify({"error": "Empty filename"}), 400
 
     filename = secure_filename(uploaded_file.filename)
-    ext = os.path.splitext(filename)[1]
-    key = f"{uuid.uuid4().hex}{ext}"
-
     upload_dir = current_app.config.get("UPLOAD_FOLDER", "uploads")
-    os.makedirs(upload_dir, exist_ok=True)
-
-    file_path = os.path.join(upload_dir, key)
-    uploaded_file.save(file_path)
-
-    # ✅ Extract text safely
-    extracted_text = extract_text_from_file(file_path)
-    if not extracted_text or not extracted_text.strip():
-        extracted_text = f"[No readable text extracted from {filename}]"
-
-    file_record = File(
-        filename=filename,
-        storage_path=file_path,
-        mimetype=uploaded_file.mimetype,
-        size=os.path.getsize(file_path),
-        uploaded_by=user.id,
-        content_text=extracted_text
-    )
 
+    # ✅ Hash while writing; identical bytes reuse the stored blob
+    content_hash, temp_path, size = save_stream(uploaded_file.stream, upload_dir)
+    file_record = create_file(user, filename, uploaded_file.mimetype, content_hash, temp_path, size)
+
+    return upload_response(file_record), 201
+
+
+def create_file(user, filename, mimetype, content_hash, temp_path, size):
+    """Turn a fully written, hashed temp file into a File and start extraction."""
+    file_record = build_file(user, filename, mimetype, content_hash, temp_path, size)
     db.session.add(file_record)
     db.session.commit()
 
+    start_extraction(file_record)
+    return file_record
+
+
+def build_file(user, filename, mimetype, content_hash, temp_path, size):
+    """Store the blob and return an unsaved File (caller adds and commits)."""
+    key = f"{uuid.uuid4().hex}{os.path.splitext(filename)[1]}"
+    blob = acquire_blob(content_hash, temp_path, key, size, mimetype)
+
+    try:
+        file_record = File(
+            filename=filename,
+            storage_path=blob.storage_path,
+            mimetype=mimetype,
+            size=blob.size,
+            uploaded_by=user.id,
+            content_hash=content_hash,
+            extraction_status="pending"
+        )
+
+        # ✅ Reuse text cached per content hash + extractor version,
+        #    otherwise extract in the background after responding
+        cached_pages = cached_extraction(content_hash)
+        if cached_pages is not None:
+            complete_extraction(file_record, cached_pages)
+    except Exception:
+        # hand the reference back; a blob created just now isn't
+        # committed yet, so nothing else can point at its bytes
+        orphan = release_blob(content_hash)
+        if orphan:
+            storage.for_path(orphan).delete(orphan)
+        raise
+
+    return file_record
+
+
+def start_extraction(file_record):
+    """After commit: index cached text now, or queue the extraction job."""
+    if file_record.extraction_status == "done":
+        publish_extraction(file_record)
+    else:
+        enqueue(current_app._get_current_object(), file_record.id, file_record.storage_path)
+
+
+def upload_response(file_record):
     return jsonify({
         "message": "File uploaded successfully",
-        "id": file_record.id
-    }), 201
+        "id": file_record.id,
+        "extraction_status": file_record.extraction_status,
+        "status_url": f"/api/files/{file_record.id}/status"
+    })
+
+
+# --------------------------------------------------
+# BULK UPLOAD (TEACHER ONLY)
+#
+# multipart "files" fields, any of which may be a .zip of notes
+#   -> {"results": [{"filename", "id", "extraction_status", "status_url"}
+#                   | {"filename", "error"}, ...]}
+# --------------------------------------------------
+def iter_zip_entries(stream, max_bytes):
+    """Yield (name, readable) for each file in a ZIP, refusing oversize archives."""
+    with zipfile.ZipFile(stream) as archive:
+        entries = [
+            info for info in archive.infolist()
+            if not info.is_dir()
+            and not info.filename.startswith("__MACOSX/")
+            and not os.path.basename(info.filename).startswith(".")
+        ]
+        # declared sizes bound what ZipExtFile will inflate
+        if sum(info.file_size for info in entries) > max_bytes:
+            raise ValueError("Archive expands past the upload size limit")
+
+        for info in entries:
+            with archive.open(info) as member:
+                yield info.filename, member
+
+
+@files_bp.route("/upload/bulk", methods=["POST"])
+def bulk_upload():
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    if user.role != "teacher":
+        return jsonify({"error": "Only teachers can upload notes"}), 403
+
+    uploads = [f for f in request.files.getlist("files") if f.filename]
+    if not uploads:
+        return jsonify({"error": "No files provided"}), 400
+
+    upload_dir = current_app.config.get("UPLOAD_FOLDER", "uploads")
+    max_files = current_app.config.get("BULK_UPLOAD_MAX_FILES", 200)
+    results = []
+    staged = []
+
+    # ✅ Stream every file to a hashed temp file; one bad entry only
+    #    fails its own result
+    def stage(name, mimetype, stream):
+        filename = secure_filename(os.path.basename(name))
+        if not filename:
+            results.append({"filename": name, "error": "Empty filename"})
+            return
+        if len(staged) >= max_files:
+            results.append({"filename": filename, "error": f"More than {max_files} files"})
+            return
+        try:
+            content_hash, temp_path, size = save_stream(stream, upload_dir)
+        except Exception as e:
+            print("❌ BULK UPLOAD ERROR:", filename, e)
+            results.append({"filename": filename, "error": "Could not read file"})
+            return
+
+        result = {"filename": filename}
+        results.append(result)
+        staged.append((result, filename, mimetype, content_hash, temp_path, size))
+
+    for uploaded in uploads:
+        if not uploaded.filename.lower().endswith(".zip"):
+            stage(uploaded.filename, uploaded.mimetype, uploaded.stream)
+            continue
+        try:
+            for name, member in iter_zip_entries(
+                uploaded.stream, current_app.config.get("BULK_UPLOAD_MAX_SIZE")
+            ):
+                stage(name, mimetypes.guess_type(name)[0], member)
+        except (zipfile.BadZipFile, ValueError) as e:
+            results.append({"filename": uploaded.filename, "error": str(e) or "Not a valid ZIP archive"})
+
+    # ✅ Store blobs, then insert every File row in one transaction
+    created = []
+    for result, filename, mimetype, content_hash, temp_path, size in staged:
+        try:
+            file_record = build_file(user, filename, mimetype, content_hash, temp_path, size)
+        except Exception as e:
+            print("❌ BULK UPLOAD ERROR:", filename, e)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            result["error"] = "Could not store file"
+            continue
+        created.append((result, file_record))
+
+    db.session.add_all(file_record for _, file_record in created)
+    db.session.commit()
+
+    # ✅ Extraction for all of them runs side by side in the process pool
+    for result, file_record in created:
+        start_extraction(file_record)
+        result.update({
+            "id": file_record.id,
+            "extraction_status": file_record.extraction_status,
+            "status_url": f"/api/files/{file_record.id}/status"
+        })
+
+    return jsonify({"results": results}), 201 if created else 400
+
+
+# --------------------------------------------------
+# RESUMABLE UPLOADS (TEACHER ONLY)
+#   POST   /uploads                 {filename, size, mimetype} -> upload_id
+#   PUT    /uploads/<id>?offset=N   raw bytes, appended at N
+#   GET    /uploads/<id>            -> offset to resume from
+#   POST   /uploads/<id>/finalize   -> same as /upload
+#   DELETE /uploads/<id>            abandon
+# --------------------------------------------------
+def get_upload_session(user, upload_id):
+    session = db.session.get(UploadSession, upload_id)
+    if session is None or session.user_id != user.id:
+        return None
+    return session
+
+
+def upload_session_json(session):
+    return {
+        "upload_id": session.id,
+        "filename": session.filename,
+        "size": session.size,
+        "offset": session.received,
+        "upload_url": f"/api/files/uploads/{session.id}"
+    }
+
+
+@files_bp.route("/uploads", methods=["POST"])
+def start_upload():
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    if user.role != "teacher":
+        return jsonify({"error": "Only teachers can upload notes"}), 403
+
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get("filename") or "")
+    size = data.get("size")
+
+    if not filename:
+        return jsonify({"error": "Empty filename"}), 400
+    if not isinstance(size, int) or size <= 0:
+        return jsonify({"error": "size must be a positive integer"}), 400
+    if size > current_app.config.get("CHUNKED_UPLOAD_MAX_SIZE"):
+        return jsonify({"error": "File too large"}), 413
+
+    expire_sessions(current_app.config.get("UPLOAD_SESSION_TTL"))
+
+    session = start_session(
+        user.id, filename, data.get("mimetype"), size,
+        current_app.config.get("UPLOAD_FOLDER", "uploads")
+    )
+    db.session.commit()
+
+    return jsonify(upload_session_json(session)), 201
+
+
+@files_bp.route("/uploads/<upload_id>", methods=["GET"])
+def upload_progress(upload_id):
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    session = get_upload_session(user, upload_id)
+    if session is None:
+        return jsonify({"error": "Upload not found"}), 404
+
+    return jsonify(upload_session_json(session))
+
+
+@files_bp.route("/uploads/<upload_id>", methods=["PUT"])
+def upload_chunk(upload_id):
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    session = get_upload_session(user, upload_id)
+    if session is None:
+        return jsonify({"error": "Upload not found"}), 404
+
+    offset = request.args.get("offset", type=int)
+    if offset is None:
+        return jsonify({"error": "offset is required"}), 400
+
+    try:
+        append_chunk(session, offset, request.stream)
+    except OffsetMismatch as e:
+        return jsonify({"error": "Offset mismatch", "offset": e.expected}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e), "offset": session.received}), 413
+    except Exception as e:
+        print("❌ CHUNK UPLOAD ERROR:", e)
+        return jsonify({"error": "Upload interrupted", "offset": session.received}), 400
+
+    return jsonify(upload_session_json(session))
+
+
+@files_bp.route("/uploads/<upload_id>/finalize", methods=["POST"])
+def finalize_upload(upload_id):
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    session = get_upload_session(user, upload_id)
+    if session is None:
+        return jsonify({"error": "Upload not found"}), 404
+
+    if session.received != session.size:
+        return jsonify({"error": "Upload incomplete", "offset": session.received}), 409
+
+    content_hash = session_digest(session)
+    filename, mimetype, temp_path, size = session.filename, session.mimetype, session.temp_path, session.size
+
+    # the temp file becomes (or is folded into) the blob in the same commit
+    db.session.delete(session)
+    file_record = create_file(user, filename, mimetype, content_hash, temp_path, size)
+
+    return upload_response(file_record), 201
+
+
+@files_bp.route("/uploads/<upload_id>", methods=["DELETE"])
+def abort_upload(upload_id):
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    session = get_upload_session(user, upload_id)
+    if session is None:
+        return jsonify({"error": "Upload not found"}), 404
+
+    discard_session(session)
+    db.session.commit()
+
+    return jsonify({"message": "Upload cancelled"})
+
+
+# --------------------------------------------------
+# EXTRACTION STATUS
+# --------------------------------------------------
+@files_bp.route("/<int:file_id>/status", methods=["GET"])
+def file_status(file_id):
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    file = File.query.get_or_404(file_id)
+
+    if user.role == "teacher" and file.uploaded_by != user.id:
+        return jsonify({"error": "Forbidden"}), 403
+
+    return jsonify({
+        "id": file.id,
+        "extraction_status": file.extraction_status,
+        "attempts": file.extraction_attempts,
+        "error": file.extraction_error,
+        "extracted_at": file.extracted_at.isoformat() if file.extracted_at else None
+    })
+
+
+# --------------------------------------------------
+# PAGE PREVIEW (JPEG)
+# --------------------------------------------------
+def is_pdf(file):
+    return file.filename.lower().endswith(".pdf")
+
+
+@files_bp.route("/<int:file_id>/preview", methods=["GET"])
+def file_preview(file_id):
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    file = File.query.get_or_404(file_id)
+
+    if user.role == "teacher" and file.uploaded_by != user.id:
+        return jsonify({"error": "Forbidden"}), 403
+
+    if not is_pdf(file):
+        return jsonify({"error": "Previews are only available for PDFs"}), 415
+
+    page = request.args.get("page", 1, type=int)
+    width = request.args.get("width", current_app.config.get("PREVIEW_DEFAULT_WIDTH", 320), type=int)
+    if page < 1 or width < 1:
+        return jsonify({"error": "page and width must be positive"}), 400
+
+    width = preview_cache.bucket(width)
+    path = preview_cache.get(file.content_hash, page, width) if file.content_hash else None
+
+    if path is None:
+        backend = storage.for_path(file.storage_path)
+        local_path, is_temp = backend.fetch(file.storage_path)
+        try:
+            if file.content_hash:
+                path = preview_cache.render(local_path, file.content_hash, page, width)
+            else:
+                # legacy rows have no hash to key the cache on
+                data = render_preview(local_path, page, width, preview_cache.quality)
+                return current_app.response_class(data, mimetype="image/jpeg")
+        except IndexError:
+            return jsonify({"error": "Page not found"}), 404
+        finally:
+            if is_temp:
+                os.remove(local_path)
+
+    # same hash, page and width always render the same image
+    rv = send_file(path, mimetype="image/jpeg", etag=f"{file.content_hash}-{page}-{width}", max_age=86400)
+    rv.cache_control.public = None
+    rv.cache_control.private = True
+    return rv
 
 
 # --------------------------------------------------
@@ -126,14 +574,16 @@ def download_file(file_id):
     if user.role == "teacher" and file.uploaded_by != user.id:
         return jsonify({"error": "Forbidden"}), 403
 
-    if not os.path.exists(file.storage_path):
+    backend = storage.for_path(file.storage_path)
+
+    # S3 objects are handed out as presigned redirects without a lookup
+    if backend is storage.local and not backend.exists(file.storage_path):
         return jsonify({"error": "File not found"}), 404
 
-    return send_file(
-        file.storage_path,
-        as_attachment=True,
-        download_name=file.filename,
-        mimetype=file.mimetype
+    return backend.send(
+        file.storage_path, file.filename, file.mimetype,
+        etag=file.content_hash,
+        last_modified=file.uploaded_at
     )
 
 
@@ -151,13 +601,26 @@ def delete_file(file_id):
     if user.role != "teacher" or file.uploaded_by != user.id:
         return jsonify({"error": "Forbidden"}), 403
 
-    try:
-        if os.path.exists(file.storage_path):
-            os.remove(file.storage_path)
-    except Exception:
-        pass
+    # shared blobs are only removed with their last reference
+    if file.content_hash:
+        orphaned_path = release_blob(file.content_hash)
+    else:
+        orphaned_path = file.storage_path
 
+    # bulk delete: don't load every page's text just to cascade
+    FilePage.query.filter_by(file_id=file_id).delete()
     db.session.delete(file)
     db.session.commit()
 
+    try:
+        if orphaned_path:
+            storage.for_path(orphaned_path).delete(orphaned_path)
+            if file.content_hash:
+                preview_cache.discard(file.content_hash)
+    except Exception as e:
+        print("❌ STORAGE DELETE ERROR:", e)
+
+    passage_index.remove_file(file_id)
+    answer_cache.invalidate_file(file_id)
+
     return jsonify({"message": "File deleted successfully"})
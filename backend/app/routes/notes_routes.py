@@ -1,19 +1,13 @@
-import os
 from flask import Blueprint, request, jsonify
 
+from ..utils.notes_index import notes_index
+
 notes_bp = Blueprint("notes", __name__)
 
-NOTES_FOLDER = "uploads"
 
-def search_notes(question):
-    results = []
-    for file in os.listdir(NOTES_FOLDER):
-        if file.endswith(".txt"):
-            with open(os.path.join(NOTES_FOLDER, file), encoding="utf-8") as f:
-                content = f.read()
-                if question.lower() in content.lower():
-                    results.append(content[:500])  # short answer
-    return results
+def search_notes(question, k=5):
+    # ranked {file, score, snippet}; the index re-reads only changed files
+    return notes_index.search(question, k)
 
 @notes_bp.route("/notes/search", methods=["POST"])
 def notes_search():
@@ -25,7 +19,8 @@ def notes_search():
     if matches:
         return jsonify({
             "found": True,
-            "answer": matches[0]
+            "answer": matches[0]["snippet"],
+            "matches": matches
         })
 
     return jsonify({
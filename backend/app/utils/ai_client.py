@@ -1,20 +1,25 @@
-import os
-from google import genai
+import threading
 
-API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
-    raise RuntimeError("GEMINI_API_KEY not found")
+from app.utils import llm_providers
+from app.utils.llm_providers import get_provider
 
-client = genai.Client(api_key=API_KEY)
+# Upstream protection: at most AI_MAX_CONCURRENCY calls in flight per
+# process, callers queue up to AI_QUEUE_TIMEOUT seconds for a slot and each
+# call is cut off after AI_CALL_TIMEOUT seconds (enforced by the provider).
+# Defaults until init_app applies the app config.
+AI_MAX_CONCURRENCY = 8
+AI_QUEUE_TIMEOUT = 30.0
+AI_CALL_TIMEOUT = 60.0
 
+AI_UNAVAILABLE_MESSAGE = "AI is temporarily unavailable. Please try again later."
 
-def ask_ai(question: str, context: str = "", history: str = "") -> str:
-    try:
-        # ----------------------------
-        # MODE 1: Notes-based answer
-        # ----------------------------
-        if context.strip():
-            prompt = f"""
+
+def build_prompt(question: str, context: str = "", history: str = "") -> str:
+    # ----------------------------
+    # MODE 1: Notes-based answer
+    # ----------------------------
+    if context.strip():
+        return f"""
 You are a helpful AI study assistant.
 
 Use the NOTES and CONVERSATION to answer.
@@ -32,11 +37,10 @@ QUESTION:
 Explain in simple student-friendly language.
 """
 
-        # ----------------------------
-        # MODE 2: Pure AI fallback
-        # ----------------------------
-        else:
-            prompt = f"""
+    # ----------------------------
+    # MODE 2: Pure AI fallback
+    # ----------------------------
+    return f"""
 You are a helpful AI study assistant.
 
 Use your general knowledge and conversation history.
@@ -50,13 +54,109 @@ QUESTION:
 Explain clearly in simple student-friendly language.
 """
 
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
 
-        return response.text.strip()
+# --------------------------------------------------
+# Concurrency limit + single-flight coalescing
+# --------------------------------------------------
+class AIBusyError(Exception):
+    pass
+
+
+class AIStreamInterrupted(Exception):
+    """The model stopped partway through a streamed answer."""
+
+
+_slots = threading.BoundedSemaphore(AI_MAX_CONCURRENCY)
+
+
+def init_app(app):
+    global AI_MAX_CONCURRENCY, AI_QUEUE_TIMEOUT, AI_CALL_TIMEOUT, _slots
+    AI_MAX_CONCURRENCY = app.config.get("AI_MAX_CONCURRENCY", AI_MAX_CONCURRENCY)
+    AI_QUEUE_TIMEOUT = app.config.get("AI_QUEUE_TIMEOUT", AI_QUEUE_TIMEOUT)
+    AI_CALL_TIMEOUT = app.config.get("AI_CALL_TIMEOUT", AI_CALL_TIMEOUT)
+    _slots = threading.BoundedSemaphore(AI_MAX_CONCURRENCY)
+    llm_providers.init_app(app)
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def _acquire_slot():
+    """The semaphore holding the slot; release that one, init_app may swap it."""
+    slots = _slots
+    if not slots.acquire(timeout=AI_QUEUE_TIMEOUT):
+        raise AIBusyError("no free AI slot after %ss" % AI_QUEUE_TIMEOUT)
+    return slots
+
+
+def _generate(prompt: str) -> str:
+    slots = _acquire_slot()
+    try:
+        return get_provider().generate(prompt).strip()
+    finally:
+        slots.release()
+
+
+def _generate_once(prompt: str) -> str:
+    """Run identical concurrent prompts as one upstream call."""
+    with _in_flight_lock:
+        call = _in_flight.get(prompt)
+        leader = call is None
+        if leader:
+            call = _in_flight[prompt] = _InFlight()
+
+    if not leader:
+        if not call.done.wait(AI_QUEUE_TIMEOUT + AI_CALL_TIMEOUT):
+            raise TimeoutError("timed out waiting for in-flight AI call")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _generate(prompt)
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(prompt, None)
+        call.done.set()
+
+
+def ask_ai(question: str, context: str = "", history: str = "") -> str:
+    try:
+        return _generate_once(build_prompt(question, context, history))
 
     except Exception as e:
         print("AI ERROR:", e)
-        return "AI is temporarily unavailable. Please try again later."
\ No newline at end of file
+        return AI_UNAVAILABLE_MESSAGE
+
+
+def ask_ai_stream(question: str, context: str = "", history: str = ""):
+    """Yield the answer in text chunks as the model produces them."""
+    produced = False
+    try:
+        slots = _acquire_slot()
+        try:
+            for text in get_provider().stream(build_prompt(question, context, history)):
+                produced = True
+                yield text
+        finally:
+            slots.release()
+
+    except Exception as e:
+        print("AI STREAM ERROR:", e)
+        if produced:
+            # the caller already has part of an answer; it must not be
+            # cached or saved as if it were complete
+            raise AIStreamInterrupted(str(e)) from e
+        yield AI_UNAVAILABLE_MESSAGE
\ No newline at end of file
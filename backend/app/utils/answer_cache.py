@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class AnswerCache:
+    """Bounded LRU + TTL cache of chat answers.
+
+    Keys carry the ids of the files whose passages were used as context, so
+    an answer can be dropped as soon as one of those files changes.
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=16 * 1024 * 1024, ttl=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._by_file = {}
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config.get("ANSWER_CACHE_MAX_ENTRIES", self.max_entries)
+        self.max_bytes = app.config.get("ANSWER_CACHE_MAX_BYTES", self.max_bytes)
+        self.ttl = app.config.get("ANSWER_CACHE_TTL", self.ttl)
+
+    @staticmethod
+    def make_key(search_query: str, file_ids, has_history: bool = False):
+        # only whether history was in the prompt, not its text: every
+        # student has their own history, and keying on it would stop
+        # them from ever sharing an answer
+        return search_query, tuple(sorted(set(file_ids))), bool(has_history)
+
+    # --------------------------------------------------
+    # Lookup / store
+    # --------------------------------------------------
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry["expires_at"] <= time.monotonic():
+                self._drop(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["value"]
+
+    def put(self, key, value: dict):
+        size = len(repr(key)) + len(repr(value))
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+            self._entries[key] = {
+                "value": value,
+                "size": size,
+                "expires_at": time.monotonic() + self.ttl,
+            }
+            self._bytes += size
+            for file_id in key[1]:
+                self._by_file.setdefault(file_id, set()).add(key)
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    # --------------------------------------------------
+    # Invalidation
+    # --------------------------------------------------
+    def invalidate_file(self, file_id: int):
+        with self._lock:
+            for key in self._by_file.pop(file_id, set()):
+                if key in self._entries:
+                    self._drop(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_file.clear()
+            self._bytes = 0
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+        for file_id in key[1]:
+            keys = self._by_file.get(file_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_file[file_id]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+answer_cache = AnswerCache()
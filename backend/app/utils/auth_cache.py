@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class UserIdentity:
+    """What request handlers need to know about the caller.
+
+    A plain value rather than a ``User`` row, so it can be cached across
+    requests and shared with worker threads without a session.
+    """
+    id: int
+    name: str
+    email: str
+    role: str
+
+
+class _TTLCache:
+    """Small LRU with a per-entry deadline; callers hold the lock."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value, ttl):
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class AuthCache:
+    """Verified token -> claims and user id -> UserIdentity, per process.
+
+    Tokens are held for at most ``ttl`` seconds and never past their own
+    ``exp``. Identities are dropped by ``invalidate_user`` when a user is
+    changed here; other workers pick the change up within ``ttl``.
+    """
+
+    def __init__(self, max_entries=10000, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._claims = _TTLCache(max_entries)
+        self._identities = _TTLCache(max_entries)
+
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config.get("AUTH_CACHE_MAX_ENTRIES", self.max_entries)
+        self.ttl = app.config.get("AUTH_CACHE_TTL", self.ttl)
+        with self._lock:
+            self._claims = _TTLCache(self.max_entries)
+            self._identities = _TTLCache(self.max_entries)
+
+    # --------------------------------------------------
+    # Lookups (``load`` runs on a miss, outside the lock)
+    # --------------------------------------------------
+    def claims(self, token: str, decode):
+        with self._lock:
+            payload = self._claims.get(token)
+            if payload is not None:
+                self.hits += 1
+                return payload
+            self.misses += 1
+
+        payload = decode(token)
+        if payload is None:
+            return None
+
+        ttl = self.ttl
+        if "exp" in payload:
+            ttl = min(ttl, payload["exp"] - time.time())
+        with self._lock:
+            self._claims.put(token, payload, ttl)
+        return payload
+
+    def identity(self, user_id: int, load):
+        with self._lock:
+            identity = self._identities.get(user_id)
+            if identity is not None:
+                self.hits += 1
+                return identity
+            self.misses += 1
+
+        identity = load(user_id)
+        if identity is None:
+            return None
+
+        with self._lock:
+            self._identities.put(user_id, identity, self.ttl)
+        return identity
+
+    # --------------------------------------------------
+    # Invalidation
+    # --------------------------------------------------
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            self._identities.pop(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._claims.clear()
+            self._identities.clear()
+
+
+auth_cache = AuthCache()
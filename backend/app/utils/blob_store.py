@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import uuid
+
+from sqlalchemy.exc import IntegrityError
+
+from app.extension import db
+from app.models import ExtractedText, StoredBlob
+from app.utils.storage import storage
+from app.utils.text_extractor import EXTRACTOR_VERSION
+
+
+CHUNK_SIZE = 1024 * 1024
+
+
+# --------------------------------------------------
+# Write an upload to disk, hashing it on the way
+# --------------------------------------------------
+def save_stream(stream, upload_dir: str):
+    """Copy ``stream`` into a temporary file; returns (sha256, path, size)."""
+    os.makedirs(upload_dir, exist_ok=True)
+    temp_path = os.path.join(upload_dir, f".{uuid.uuid4().hex}.part")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, "wb") as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return digest.hexdigest(), temp_path, size
+
+
+# --------------------------------------------------
+# Reference-counted blobs
+# --------------------------------------------------
+def _add_reference(content_hash: str) -> bool:
+    updated = StoredBlob.query.filter_by(content_hash=content_hash)\
+        .update({"ref_count": StoredBlob.ref_count + 1})
+    return updated > 0
+
+
+def acquire_blob(content_hash: str, temp_path: str, key: str, size: int, content_type: str = None):
+    """Take a reference on the blob for ``content_hash``.
+
+    Reuses an existing blob (discarding ``temp_path``) or saves the temp
+    file under ``key`` in the default storage backend and registers it.
+    Flushes but does not commit.
+    """
+    if _add_reference(content_hash):
+        os.remove(temp_path)
+        return db.session.get(StoredBlob, content_hash)
+
+    backend = storage.default
+    storage_path = backend.save(temp_path, key, content_type)
+    blob = StoredBlob(content_hash=content_hash, storage_path=storage_path, size=size, ref_count=1)
+    try:
+        # savepoint: losing the race must only undo this insert, not the
+        # references and blobs already flushed in the caller's transaction
+        with db.session.begin_nested():
+            db.session.add(blob)
+    except IntegrityError:
+        # lost a race with an identical concurrent upload
+        backend.delete(storage_path)
+        _add_reference(content_hash)
+        blob = db.session.get(StoredBlob, content_hash, populate_existing=True)
+    return blob
+
+
+def release_blob(content_hash: str):
+    """Drop one reference; returns the storage path to delete once the last one goes.
+
+    The caller deletes it (``storage.for_path(path).delete(path)``) only
+    after its transaction commits.
+    """
+    StoredBlob.query.filter_by(content_hash=content_hash)\
+        .update({"ref_count": StoredBlob.ref_count - 1})
+
+    blob = db.session.get(StoredBlob, content_hash, populate_existing=True)
+    if blob is None or blob.ref_count > 0:
+        return None
+
+    db.session.delete(blob)
+    return blob.storage_path
+
+
+# --------------------------------------------------
+# Extraction cache (content hash + extractor version)
+# --------------------------------------------------
+def cached_extraction(content_hash: str):
+    """Cached page texts for ``content_hash``, or None."""
+    row = db.session.get(ExtractedText, (content_hash, EXTRACTOR_VERSION))
+    return json.loads(row.text) if row is not None else None
+
+
+def store_extraction(content_hash: str, pages: list):
+    db.session.merge(ExtractedText(
+        content_hash=content_hash,
+        extractor_version=EXTRACTOR_VERSION,
+        text=json.dumps(pages)
+    ))
@@ -0,0 +1,89 @@
+import math
+from collections import Counter
+
+from app.utils.query_analyzer import Vocabulary, analyze_query
+
+
+# Shared by the passage index and the notes folder index, so ranking
+# tweaks land in one place.
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+class BM25Postings:
+    """Inverted index of analyzed documents plus what BM25 needs to score them.
+
+    Documents are keyed by any hashable id. Not thread-safe: the owning
+    index holds its lock around ``add``, ``remove`` and ``snapshot``, and
+    scores the snapshot with ``bm25_scores`` after releasing it.
+    """
+
+    def __init__(self):
+        # term -> {doc: (tf, doc length)}
+        self._postings = {}
+        self._docs = {}
+        self.total_length = 0
+        self.vocabulary = Vocabulary()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, doc):
+        return doc in self._docs
+
+    def add(self, doc, tokens):
+        """Index ``tokens`` (already analyzed) under ``doc``; returns their counts."""
+        self.remove(doc)
+        counts = Counter(tokens)
+        length = len(tokens)
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[doc] = (tf, length)
+            self.vocabulary.add(term)
+
+        self._docs[doc] = (tuple(counts), length)
+        self.total_length += length
+        return counts
+
+    def remove(self, doc):
+        entry = self._docs.pop(doc, None)
+        if entry is None:
+            return
+        terms, length = entry
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc]
+            self.vocabulary.discard(term)
+            if not postings:
+                del self._postings[term]
+        self.total_length -= length
+
+    def clear(self):
+        self._postings.clear()
+        self._docs.clear()
+        self.total_length = 0
+        self.vocabulary.clear()
+
+    def snapshot(self, question: str):
+        """(query terms, copied postings, doc count, average length) for ``question``.
+
+        The copies are plain dicts, so they can be scored while the index
+        keeps changing.
+        """
+        terms = set(analyze_query(question, self.vocabulary))
+        n = len(self._docs)
+        if not terms or not n:
+            return terms, [], n, 0.0
+        postings = [dict(self._postings[t]) for t in terms if t in self._postings]
+        return terms, postings, n, self.total_length / n or 1.0
+
+
+def bm25_scores(postings, n, avg_length):
+    """Sum BM25 over ``postings``: one {doc: (tf, doc length)} per query term."""
+    scores = {}
+    for docs in postings:
+        df = len(docs)
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for doc, (tf, length) in docs.items():
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+    return scores
@@ -0,0 +1,98 @@
+import json
+import re
+
+from flask import current_app
+
+from app.extension import db
+from app.models import ChatHistory, ChatMemory
+
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def _limits():
+    config = current_app.config
+    return (
+        config.get("CHAT_MEMORY_RAW_TURNS", 2),
+        config.get("CHAT_MEMORY_TURN_CHARS", 800),
+        config.get("CHAT_MEMORY_SUMMARY_CHARS", 1500),
+    )
+
+
+def _clip(text: str, limit: int) -> str:
+    text = (text or "").strip()
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+def _condense(question: str, answer: str) -> str:
+    """One summary line for an exchange that left the raw window."""
+    first_sentence = SENTENCE_END_RE.split((answer or "").strip(), 1)[0]
+    return f"- Asked: {_clip(question, 160)} | Answer: {_clip(first_sentence, 200)}"
+
+
+def format_memory(summary: str, turns) -> str:
+    history = ""
+    if summary:
+        history += f"Summary of earlier conversation:\n{summary}\n"
+    for question, answer in turns:
+        history += f"User: {question}\nAssistant: {answer}\n"
+    return history
+
+
+# --------------------------------------------------
+# Read memory for the prompt
+# --------------------------------------------------
+def load_memory(user_id: int):
+    """(summary, recent turns) as the next prompt will see them."""
+    raw_turns, turn_chars, _ = _limits()
+
+    memory = db.session.get(ChatMemory, user_id)
+    if memory is not None:
+        return memory.summary, json.loads(memory.recent_turns)
+
+    # users from before chat memory existed: seed from their raw history
+    chats = ChatHistory.query.filter_by(user_id=user_id)\
+        .order_by(ChatHistory.created_at.desc(), ChatHistory.id.desc())\
+        .limit(raw_turns).all()
+    chats.reverse()
+
+    return "", [
+        [_clip(c.question, turn_chars), _clip(c.answer, turn_chars)]
+        for c in chats
+    ]
+
+
+# --------------------------------------------------
+# Fold a finished exchange into memory (caller commits)
+# --------------------------------------------------
+def record_turn(user_id: int, question: str, answer: str, seed=None):
+    """``seed`` is what load_memory returned when the question was asked.
+
+    It only matters for users without a memory row yet: their first row
+    starts from that raw history instead of from nothing. It is passed
+    in rather than re-read because the caller may already have added
+    this exchange to ChatHistory.
+    """
+    raw_turns, turn_chars, summary_chars = _limits()
+
+    memory = db.session.get(ChatMemory, user_id)
+    if memory is None:
+        summary, turns = seed or ("", [])
+        memory = ChatMemory(user_id=user_id, summary=summary,
+                            recent_turns=json.dumps(turns), turn_count=len(turns))
+        db.session.add(memory)
+
+    turns = json.loads(memory.recent_turns)
+    turns.append([_clip(question, turn_chars), _clip(answer, turn_chars)])
+
+    lines = memory.summary.splitlines() if memory.summary else []
+    while len(turns) > raw_turns:
+        lines.append(_condense(*turns.pop(0)))
+
+    # drop the oldest summary lines once over budget
+    while lines and sum(len(line) + 1 for line in lines) > summary_chars:
+        lines.pop(0)
+
+    memory.summary = "\n".join(lines)
+    memory.recent_turns = json.dumps(turns)
+    memory.turn_count = (memory.turn_count or 0) + 1
@@ -0,0 +1,113 @@
+# Rough size of a prompt token for English notes; good enough for budgeting
+# without pulling in the model's tokenizer.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _stitch(start, end, text, piece):
+    """Union of the slice ``[start, end)`` and an overlapping ``piece``.
+
+    Both are slices of the same document, so the overlapping characters
+    are identical and the union can be stitched without the source.
+    """
+    if piece.start < start:
+        text = piece.text[:start - piece.start] + text
+    if piece.end > end:
+        text = text + piece.text[len(piece.text) - (piece.end - end):]
+    return min(start, piece.start), max(end, piece.end), text
+
+
+class _Span:
+    def __init__(self, hit):
+        passage = hit.passage
+        self.file_id = passage.file_id
+        self.filename = passage.filename
+        self.page = passage.page
+        self.start = passage.start
+        self.end = passage.end
+        self.text = passage.text
+        self.score = hit.score
+
+    def overlaps(self, passage):
+        return (
+            passage.file_id == self.file_id
+            and passage.start < self.end
+            and passage.end > self.start
+        )
+
+    def header(self):
+        return f"{self.filename} (page {self.page}):"
+
+
+def build_context(hits, token_budget: int):
+    """Pack the best scoring passages into ``token_budget`` tokens.
+
+    ``hits`` must be ordered best first. Overlapping passages of the same
+    file are merged into one span instead of being sent twice. Returns the
+    context string and, per span, where it came from.
+    """
+    spans = []
+    used = 0
+
+    for hit in hits:
+        passage = hit.passage
+        overlapping = [s for s in spans if s.overlaps(passage)]
+
+        if overlapping:
+            # the passage may bridge several spans: fold them all into the
+            # first so no text is sent twice
+            span, others = overlapping[0], overlapping[1:]
+            start, end, merged = span.start, span.end, span.text
+            for piece in [passage] + others:
+                start, end, merged = _stitch(start, end, merged, piece)
+
+            extra = estimate_tokens(merged) - sum(
+                estimate_tokens(s.text) for s in overlapping
+            ) - sum(estimate_tokens(s.header()) for s in others)
+            if used + extra > token_budget:
+                continue
+            span.text = merged
+            span.start = start
+            span.end = end
+            span.score = max([hit.score] + [s.score for s in overlapping])
+            spans = [s for s in spans if s not in others]
+            used += extra
+            continue
+
+        span = _Span(hit)
+        cost = estimate_tokens(span.header()) + estimate_tokens(span.text)
+        if used + cost > token_budget:
+            if spans:
+                continue
+            # the single best passage is bigger than the budget: trim it
+            # rather than sending no notes at all
+            keep = max(0, (token_budget - estimate_tokens(span.header())) * CHARS_PER_TOKEN)
+            span.text = span.text[:keep]
+            span.end = span.start + keep
+            cost = token_budget
+
+        spans.append(span)
+        used += cost
+
+    # read each file's spans in document order, files by best score
+    file_rank = {}
+    for span in spans:
+        file_rank[span.file_id] = max(file_rank.get(span.file_id, 0.0), span.score)
+    spans.sort(key=lambda s: (-file_rank[s.file_id], s.file_id, s.start))
+
+    context = "\n\n".join(f"{s.header()}\n{s.text}" for s in spans)
+    passages = [
+        {
+            "file_id": s.file_id,
+            "filename": s.filename,
+            "page": s.page,
+            "start": s.start,
+            "end": s.end,
+            "score": round(s.score, 4),
+        }
+        for s in spans
+    ]
+    return context, passages
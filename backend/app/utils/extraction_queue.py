@@ -0,0 +1,230 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from app.extension import db
+from app.models import File, FilePage
+from app.utils.answer_cache import answer_cache
+from app.utils.blob_store import store_extraction
+from app.utils.previews import preview_cache, render_preview
+from app.utils.search_index import passage_index
+from app.utils.storage import storage
+from app.utils.text_extractor import merge_pages, submit_extraction
+
+
+# Extraction is CPU-bound (PyMuPDF), so it runs in a process pool. Large
+# PDFs are split into page ranges across the same pool rather than each
+# worker starting a pool of its own. Results are written back on a single
+# thread that owns the app context, which keeps all database work for
+# finished jobs in one place. Files kept in S3 are first downloaded to a
+# local temp copy on a fetch thread, off the request that queued them.
+_lock = threading.Lock()
+_pool = None
+_finisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="extraction-finish")
+_fetcher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="extraction-fetch")
+
+# jobs queued, running or waiting to retry; lets the CLI wait for idle
+_outstanding = 0
+_idle = threading.Condition()
+
+
+def _track(delta):
+    global _outstanding
+    with _idle:
+        _outstanding += delta
+        if _outstanding == 0:
+            _idle.notify_all()
+
+
+def wait_for_idle(timeout=None):
+    with _idle:
+        return _idle.wait_for(lambda: _outstanding == 0, timeout)
+
+
+def _get_pool(app):
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=app.config.get("EXTRACTION_WORKERS", 2),
+                # fresh interpreters: no inherited DB connections or locks
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool(broken):
+    global _pool
+    with _lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+# --------------------------------------------------
+# Apply a finished extraction (caller commits)
+# --------------------------------------------------
+def complete_extraction(file_record, pages: list):
+    if not any(text.strip() for text in pages):
+        pages = [f"[No readable text extracted from {file_record.filename}]"]
+
+    file_record.pages = [
+        FilePage(page_number=n, text=text, char_count=len(text))
+        for n, text in enumerate(pages, start=1)
+    ]
+    file_record.extraction_status = "done"
+    file_record.extraction_error = None
+    file_record.extracted_at = datetime.utcnow()
+
+
+def publish_extraction(file_record):
+    """Make a committed extraction visible to chat in this worker."""
+    passage_index.add_file(
+        file_record.id, file_record.filename,
+        [(page.page_number, page.text) for page in file_record.pages],
+        version=file_record.extracted_at
+    )
+    answer_cache.invalidate_file(file_record.id)
+
+
+# --------------------------------------------------
+# Queue
+# --------------------------------------------------
+def _submit(app, pool, path):
+    return submit_extraction(
+        pool, path,
+        parts=app.config.get("EXTRACTION_WORKERS", 2),
+        min_pages=app.config.get("PDF_PARALLEL_MIN_PAGES", 64)
+    )
+
+
+def _submit_preview(app, pool, path):
+    """Render page 1 for the notes list alongside the text; None for non-PDFs."""
+    if os.path.splitext(path)[1].lower() != ".pdf":
+        return None
+    width = preview_cache.bucket(app.config.get("PREVIEW_DEFAULT_WIDTH", 320))
+    return width, pool.submit(render_preview, path, 1, width, preview_cache.quality)
+
+
+def enqueue(app, file_id: int, path: str):
+    _track(+1)
+    if storage.for_path(path) is storage.local:
+        _start(app, file_id, path)
+    else:
+        _fetcher.submit(_start, app, file_id, path)
+
+
+def _start(app, file_id, path):
+    local_path = None
+    try:
+        local_path, is_temp = storage.for_path(path).fetch(path)
+        if not is_temp:
+            local_path = None
+
+        pool = _get_pool(app)
+        try:
+            futures = _submit(app, pool, local_path or path)
+        except BrokenProcessPool:
+            _reset_pool(pool)
+            pool = _get_pool(app)
+            futures = _submit(app, pool, local_path or path)
+        preview = _submit_preview(app, pool, local_path or path)
+    except Exception as e:
+        # a failed download goes through the same retry accounting
+        failed = Future()
+        failed.set_exception(e)
+        _finisher.submit(_finish, app, file_id, path, None, [failed], local_path)
+        return
+
+    # finish once every page range (and the preview) is back
+    parts = futures + ([preview[1]] if preview else [])
+    remaining = [len(parts)]
+    remaining_lock = threading.Lock()
+
+    def part_done(_):
+        with remaining_lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        _finisher.submit(_finish, app, file_id, path, pool, futures, local_path, preview)
+
+    for future in parts:
+        future.add_done_callback(part_done)
+
+
+def _finish(app, file_id, path, pool, futures, local_copy=None, preview=None):
+    with app.app_context():
+        try:
+            file_record = db.session.get(File, file_id)
+            if file_record is None:
+                # deleted while extraction was running
+                return
+
+            try:
+                pages = merge_pages(futures)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    _reset_pool(pool)
+                _retry_or_fail(app, file_record, path, e)
+                return
+
+            complete_extraction(file_record, pages)
+            if file_record.content_hash:
+                store_extraction(file_record.content_hash, pages)
+            db.session.commit()
+
+            publish_extraction(file_record)
+
+            # a missing thumbnail is rendered on first request instead
+            if preview and file_record.content_hash and not preview[1].exception():
+                width, future = preview
+                preview_cache.put(file_record.content_hash, 1, width, future.result())
+
+        except Exception as e:
+            db.session.rollback()
+            print("❌ EXTRACTION JOB ERROR:", file_id, e)
+        finally:
+            db.session.remove()
+            if local_copy and os.path.exists(local_copy):
+                os.remove(local_copy)
+            _track(-1)
+
+
+def _retry_or_fail(app, file_record, path, error):
+    file_record.extraction_attempts += 1
+    file_record.extraction_error = f"{type(error).__name__}: {error}"
+    print("❌ TEXT EXTRACTION ERROR:", file_record.id, file_record.extraction_error)
+
+    if file_record.extraction_attempts >= app.config.get("EXTRACTION_MAX_ATTEMPTS", 3):
+        file_record.extraction_status = "failed"
+        db.session.commit()
+        return
+
+    file_record.extraction_status = "pending"
+    db.session.commit()
+
+    delay = app.config.get("EXTRACTION_RETRY_DELAY", 5) * file_record.extraction_attempts
+    _track(+1)
+    timer = threading.Timer(delay, _requeue, args=(app, file_record.id, path))
+    timer.daemon = True
+    timer.start()
+
+
+def _requeue(app, file_id, path):
+    try:
+        enqueue(app, file_id, path)
+    finally:
+        _track(-1)
+
+
+def resume_pending(app):
+    """Requeue jobs lost to a restart; returns how many were queued."""
+    with app.app_context():
+        rows = db.session.query(File.id, File.storage_path)\
+            .filter(File.extraction_status == "pending").all()
+    for file_id, path in rows:
+        enqueue(app, file_id, path)
+    return len(rows)
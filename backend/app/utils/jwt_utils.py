@@ -3,6 +3,7 @@ import datetime
 from flask import current_app, request, g
 from functools import wraps
 from ..models import User
+from .auth_cache import UserIdentity, auth_cache
 from flask import abort
 
 
@@ -23,8 +24,49 @@ def decode_token(token: str):
     except Exception:
         return None
 
+def bearer_token(req=None):
+    auth = (req or request).headers.get("Authorization", "")
+    parts = auth.split()
+    if len(parts) != 2 or parts[0].lower() != "bearer":
+        return None
+    return parts[1]
+
+def load_identity(user_id):
+    user = User.query.get(user_id)
+    if not user:
+        return None
+    return UserIdentity(id=user.id, name=user.name, email=user.email, role=user.role)
+
+def identity_from_claims(payload):
+    """UserIdentity for verified token claims, or None; cached by auth_cache."""
+    if not payload or "sub" not in payload:
+        return None
+    try:
+        user_id = int(payload["sub"])
+    except (TypeError, ValueError):
+        return None
+    return auth_cache.identity(user_id, load_identity)
+
+def identity_from_token(token: str):
+    """UserIdentity for a bearer token, or None; both steps go through auth_cache."""
+    return identity_from_claims(auth_cache.claims(token, decode_token))
+
+def reset_current_user():
+    # g lives on the app context, which can outlive a request (tests,
+    # app.app_context() blocks): never let one request see another's user
+    g.pop("_current_user", None)
+
 def get_current_user():
-    return getattr(g, "_current_user", None)
+    """Caller's UserIdentity, or None when the request isn't authenticated.
+
+    Set by token_required; routes that allow anonymous callers resolve it
+    here on first use. Either way it's looked up once per request
+    (reset_current_user runs before each one).
+    """
+    if "_current_user" not in g:
+        token = bearer_token()
+        g._current_user = identity_from_token(token) if token else None
+    return g._current_user
 
 def token_required(f):
     @wraps(f)
@@ -34,20 +76,18 @@ def token_required(f):
         if request.method == "OPTIONS":
             return '', 200
 
-        auth = request.headers.get("Authorization", "")
-        if not auth:
+        if not request.headers.get("Authorization"):
             abort(401, description="authorization header required")
 
-        parts = auth.split()
-        if len(parts) != 2 or parts[0].lower() != "bearer":
+        token = bearer_token()
+        if not token:
             abort(401, description="invalid authorization header")
 
-        token = parts[1]
-        payload = decode_token(token)
+        payload = auth_cache.claims(token, decode_token)
         if not payload or "sub" not in payload:
             abort(401, description="invalid or expired token")
 
-        user = User.query.get(payload["sub"])
+        user = identity_from_claims(payload)
         if not user:
             abort(401, description="user not found")
 
@@ -0,0 +1,155 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class LLMProvider(ABC):
+    """What ai_client needs from a model backend."""
+
+    @abstractmethod
+    def generate(self, prompt: str) -> str:
+        """The whole answer as one string."""
+
+    @abstractmethod
+    def stream(self, prompt: str):
+        """Yield the answer in text chunks."""
+
+
+# --------------------------------------------------
+# Gemini (google-genai), imported and built on first use
+# --------------------------------------------------
+class GeminiProvider(LLMProvider):
+    def __init__(self, api_key: str, model: str, timeout: float):
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is not None:
+            return self._client
+
+        with self._lock:
+            if self._client is None:
+                if not self.api_key:
+                    raise RuntimeError("GEMINI_API_KEY not found")
+
+                from google import genai
+                from google.genai import types
+
+                self._client = genai.Client(
+                    api_key=self.api_key,
+                    http_options=types.HttpOptions(timeout=int(self.timeout * 1000))
+                )
+        return self._client
+
+    def generate(self, prompt: str) -> str:
+        response = self._get_client().models.generate_content(
+            model=self.model,
+            contents=prompt
+        )
+        return response.text
+
+    def stream(self, prompt: str):
+        for chunk in self._get_client().models.generate_content_stream(
+            model=self.model,
+            contents=prompt
+        ):
+            if chunk.text:
+                yield chunk.text
+
+
+# --------------------------------------------------
+# Offline fake for load tests and profiling
+# --------------------------------------------------
+FAKE_WORDS = (
+    "the notes explain that energy moves through each stage of the process "
+    "so students should review the key terms definitions and worked examples "
+    "before comparing causes effects and the main ideas in this chapter"
+).split()
+
+
+class FakeProvider(LLMProvider):
+    """Deterministic local model stand-in.
+
+    Waits ``latency`` seconds before the first token, then emits
+    ``answer_tokens`` words at ``tokens_per_second``. The same prompt
+    always produces the same answer.
+    """
+
+    def __init__(self, latency=0.5, tokens_per_second=50.0, answer_tokens=120):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.answer_tokens = answer_tokens
+
+    def _words(self, prompt: str):
+        seed = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        return [rng.choice(FAKE_WORDS) for _ in range(self.answer_tokens)]
+
+    def _token_delay(self):
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def generate(self, prompt: str) -> str:
+        words = self._words(prompt)
+        time.sleep(self.latency + self._token_delay() * len(words))
+        return " ".join(words)
+
+    def stream(self, prompt: str):
+        time.sleep(self.latency)
+        delay = self._token_delay()
+        for n, word in enumerate(self._words(prompt)):
+            if delay:
+                time.sleep(delay)
+            yield word if n == 0 else " " + word
+
+
+# --------------------------------------------------
+# Selection (LLM_PROVIDER=gemini|fake)
+# --------------------------------------------------
+_provider = None
+_provider_lock = threading.Lock()
+_call_timeout = 60.0
+
+
+def init_app(app):
+    global _call_timeout
+    _call_timeout = app.config.get("AI_CALL_TIMEOUT", _call_timeout)
+
+
+def create_provider(name: str = None) -> LLMProvider:
+    name = (name or os.getenv("LLM_PROVIDER", "gemini")).lower()
+
+    if name == "fake":
+        return FakeProvider(
+            latency=float(os.getenv("FAKE_LLM_LATENCY", 0.5)),
+            tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", 50)),
+            answer_tokens=int(os.getenv("FAKE_LLM_ANSWER_TOKENS", 120)),
+        )
+
+    if name == "gemini":
+        return GeminiProvider(
+            api_key=os.getenv("GEMINI_API_KEY"),
+            model=os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
+            timeout=_call_timeout,
+        )
+
+    raise ValueError(f"unknown LLM_PROVIDER {name!r}")
+
+
+def get_provider() -> LLMProvider:
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = create_provider()
+    return _provider
+
+
+def set_provider(provider: LLMProvider):
+    global _provider
+    _provider = provider
@@ -0,0 +1,132 @@
+import heapq
+import os
+import threading
+import time
+
+from app.utils.bm25 import BM25Postings, bm25_scores
+from app.utils.query_analyzer import TOKEN_RE, analyze, stem
+
+
+class NotesFolderIndex:
+    """Inverted index over the ``.txt`` notes in one folder.
+
+    Files are keyed by name and remembered with their (mtime, size); a
+    refresh stats the folder and re-reads only files whose stat changed.
+    Refreshes are throttled to one per ``refresh_interval`` seconds, so
+    most searches never touch the disk at all.
+    """
+
+    def __init__(self, folder="uploads", refresh_interval=2.0, snippet_chars=240):
+        self.folder = folder
+        self.refresh_interval = refresh_interval
+        self.snippet_chars = snippet_chars
+        self._lock = threading.RLock()
+        self._stats = {}
+        self._texts = {}
+        self._postings = BM25Postings()
+        self._refreshed_at = None
+
+    def init_app(self, app):
+        self.folder = app.config.get("NOTES_FOLDER", self.folder)
+        self.refresh_interval = app.config.get("NOTES_REFRESH_INTERVAL", self.refresh_interval)
+
+    # --------------------------------------------------
+    # Change detection
+    # --------------------------------------------------
+    def refresh(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._refreshed_at is not None \
+                    and now - self._refreshed_at < self.refresh_interval:
+                return
+            self._refreshed_at = now
+
+            current = {}
+            if os.path.isdir(self.folder):
+                for entry in os.scandir(self.folder):
+                    if entry.name.endswith(".txt") and entry.is_file():
+                        stat = entry.stat()
+                        current[entry.name] = (stat.st_mtime_ns, stat.st_size)
+
+            for name in set(self._stats) - set(current):
+                self._remove(name)
+
+            for name, stat in current.items():
+                if self._stats.get(name) != stat:
+                    self._load(name, stat)
+
+    def _load(self, name, stat):
+        try:
+            with open(os.path.join(self.folder, name), encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        except OSError as e:
+            print("❌ NOTES INDEX ERROR:", name, e)
+            return
+
+        self._postings.add(name, analyze(text))
+        self._stats[name] = stat
+        self._texts[name] = text
+
+    def _remove(self, name):
+        if name not in self._stats:
+            return
+        self._postings.remove(name)
+        del self._stats[name]
+        del self._texts[name]
+
+    # --------------------------------------------------
+    # Query
+    # --------------------------------------------------
+    def search(self, question: str, k: int = 5):
+        """Best ``k`` notes as dicts of file, score and snippet."""
+        self.refresh()
+
+        with self._lock:
+            terms, postings, n, avg_length = self._postings.snapshot(question)
+        if not postings:
+            return []
+
+        scores = bm25_scores(postings, n, avg_length)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        with self._lock:
+            # skip notes removed by a refresh since the snapshot
+            texts = {name: self._texts[name] for name, _ in best if name in self._texts}
+
+        phrase = question.strip().lower()
+        return [
+            {
+                "file": name,
+                "score": round(score, 4),
+                "snippet": self._snippet(texts[name], phrase, terms),
+            }
+            for name, score in best if name in texts
+        ]
+
+    def _snippet(self, text, phrase, terms):
+        """Text around the whole question if it appears, else the first matching term."""
+        lowered = text.lower()
+        start = lowered.find(phrase) if phrase else -1
+        end = start + len(phrase)
+
+        if start < 0:
+            for match in TOKEN_RE.finditer(lowered):
+                if stem(match.group()) in terms:
+                    start, end = match.span()
+                    break
+            else:
+                start, end = 0, 0
+
+        pad = max(0, (self.snippet_chars - (end - start)) // 2)
+        left = max(0, start - pad)
+        right = min(len(text), end + pad)
+        # widen to whole words
+        while left > 0 and not text[left - 1].isspace():
+            left -= 1
+        while right < len(text) and not text[right].isspace():
+            right += 1
+
+        snippet = " ".join(text[left:right].split())
+        return ("…" if left > 0 else "") + snippet + ("…" if right < len(text) else "")
+
+
+notes_index = NotesFolderIndex()
@@ -0,0 +1,159 @@
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Too many hashes queued; the caller should answer 503."""
+
+
+# --------------------------------------------------
+# Worker-side functions (run in the pool)
+# --------------------------------------------------
+@lru_cache(maxsize=8)
+def _parameters(method: str) -> str:
+    # "scrypt" -> "scrypt:32768:8:1", as Werkzeug writes it into the hash
+    return generate_password_hash("", method).split("$", 1)[0]
+
+
+def hash_password(password: str, method: str) -> str:
+    return generate_password_hash(password, method)
+
+
+def verify_password(pwhash: str, password: str, method: str):
+    """(matches, new hash if the stored one uses other parameters)."""
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if pwhash.split("$", 1)[0] != _parameters(method):
+        return True, generate_password_hash(password, method)
+    return True, None
+
+
+# --------------------------------------------------
+# Request-side pool with a bounded backlog
+# --------------------------------------------------
+class PasswordHasher:
+    """Runs scrypt/pbkdf2 in a process pool so a login storm can't hold
+    every request thread's core.
+
+    At most ``workers + max_queued`` hashes are in flight; past that
+    ``HasherBusy`` is raised straight away instead of queueing requests
+    behind work that can't finish in time. ``workers=0`` hashes inline.
+    """
+
+    def __init__(self, method="scrypt", workers=2, max_queued=32, timeout=10):
+        self.method = method
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(workers + max_queued)
+
+    def init_app(self, app):
+        self.method = app.config.get("PASSWORD_HASH_METHOD", self.method)
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS", self.workers)
+        self.max_queued = app.config.get("PASSWORD_HASH_MAX_QUEUED", self.max_queued)
+        self.timeout = app.config.get("PASSWORD_HASH_TIMEOUT", self.timeout)
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queued)
+
+    def set_workers(self, workers: int):
+        """Resize the pool, e.g. for a one-off CLI import on an idle box."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self.workers = workers
+            self._slots = threading.BoundedSemaphore(workers + self.max_queued)
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _reset_pool(self, broken):
+        with self._lock:
+            if self._pool is broken:
+                self._pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args, wait=False):
+        """Queue ``fn`` in the pool holding one backlog slot until it finishes.
+
+        With ``wait`` the caller blocks up to ``timeout`` for a slot instead
+        of getting HasherBusy straight away.
+        """
+        slots = self._slots
+        acquired = slots.acquire(timeout=self.timeout) if wait else slots.acquire(blocking=False)
+        if not acquired:
+            raise HasherBusy()
+        try:
+            pool = self._get_pool()
+            try:
+                future = pool.submit(fn, *args)
+            except BrokenProcessPool:
+                self._reset_pool(pool)
+                future = self._get_pool().submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        # the slot is held until the worker is done, even if we stop waiting
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def _result(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HasherBusy()
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        return self._result(self._submit(fn, *args))
+
+    # --------------------------------------------------
+    # API
+    # --------------------------------------------------
+    def hash(self, password: str) -> str:
+        return self._run(hash_password, password, self.method)
+
+    def verify(self, pwhash: str, password: str):
+        """(matches, upgraded hash or None); see verify_password."""
+        return self._run(verify_password, pwhash, password, self.method)
+
+    def hash_many(self, passwords):
+        """Hashes in order, for bulk work such as CSV imports.
+
+        Goes through the same backlog slots as logins, waiting for free
+        ones rather than failing, but keeps at most ``workers`` of its own
+        jobs in flight so the queued part of the backlog stays free for
+        interactive requests. Raises HasherBusy if no slot frees up within
+        ``timeout``.
+        """
+        passwords = list(passwords)
+        if self.workers <= 0:
+            return [hash_password(p, self.method) for p in passwords]
+
+        hashes = []
+        in_flight = deque()
+        for password in passwords:
+            if len(in_flight) >= self.workers:
+                hashes.append(self._result(in_flight.popleft()))
+            in_flight.append(self._submit(hash_password, password, self.method, wait=True))
+        while in_flight:
+            hashes.append(self._result(in_flight.popleft()))
+        return hashes
+
+
+# sized by PASSWORD_HASH_WORKERS in init_app; every app worker gets its own pool
+password_hasher = PasswordHasher()
@@ -0,0 +1,147 @@
+import os
+import threading
+import uuid
+
+import fitz  # PyMuPDF
+
+
+DEFAULT_WIDTHS = (160, 320, 640, 1024)
+
+
+def render_preview(path: str, page: int, width: int, quality: int = 75) -> bytes:
+    """JPEG of 1-based ``page`` scaled to ``width`` pixels.
+
+    Plain function so extraction workers can run it next to the text job.
+    Raises IndexError for pages past the end.
+    """
+    with fitz.open(path) as doc:
+        if not 1 <= page <= doc.page_count:
+            raise IndexError(f"page {page} out of range")
+        pdf_page = doc[page - 1]
+        zoom = width / pdf_page.rect.width
+        pixmap = pdf_page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return pixmap.tobytes("jpeg", jpg_quality=quality)
+
+
+class PreviewCache:
+    """Rendered page images on disk, named ``<content hash>_<page>_<width>.jpg``.
+
+    Requested widths are rounded up to a few fixed sizes so the cache holds
+    a handful of variants per page. Reads touch the file's mtime; once the
+    directory grows past ``max_bytes`` the least recently used images are
+    removed. Every worker shares the directory.
+    """
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024, widths=DEFAULT_WIDTHS, quality=75):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.widths = tuple(sorted(widths))
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._size = None
+
+    def init_app(self, app):
+        self.directory = app.config.get("PREVIEW_CACHE_DIR", self.directory)
+        self.max_bytes = app.config.get("PREVIEW_CACHE_MAX_BYTES", self.max_bytes)
+        self.widths = tuple(sorted(app.config.get("PREVIEW_WIDTHS", self.widths)))
+        self.quality = app.config.get("PREVIEW_JPEG_QUALITY", self.quality)
+
+    def bucket(self, width: int) -> int:
+        for size in self.widths:
+            if width <= size:
+                return size
+        return self.widths[-1]
+
+    def _path(self, content_hash: str, page: int, width: int) -> str:
+        return os.path.join(self.directory, f"{content_hash}_{page}_{width}.jpg")
+
+    # --------------------------------------------------
+    # Lookup / store
+    # --------------------------------------------------
+    def get(self, content_hash: str, page: int, width: int):
+        """Path of the cached image, or None."""
+        path = self._path(content_hash, page, width)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, content_hash: str, page: int, width: int, data: bytes) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(content_hash, page, width)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as out:
+            out.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    def render(self, local_path: str, content_hash: str, page: int, width: int) -> str:
+        """Cached image path, rendering and storing it on a miss."""
+        width = self.bucket(width)
+        path = self.get(content_hash, page, width)
+        if path is None:
+            path = self.put(content_hash, page, width, render_preview(local_path, page, width, self.quality))
+        return path
+
+    # --------------------------------------------------
+    # Eviction (caller holds the lock)
+    # --------------------------------------------------
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".jpg"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self, keep=None):
+        # other workers write here too, so start from what's on disk and
+        # free a margin to avoid evicting on every put
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def discard(self, content_hash: str):
+        """Drop every cached image of a blob that no longer exists."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        prefix = f"{content_hash}_"
+        with self._lock:
+            for entry in os.scandir(self.directory):
+                if entry.name.startswith(prefix):
+                    try:
+                        size = entry.stat().st_size
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        continue
+                    if self._size is not None:
+                        self._size -= size
+
+
+preview_cache = PreviewCache()
@@ -0,0 +1,150 @@
+import re
+from functools import lru_cache
+
+
+# --------------------------------------------------
+# Command phrase stripping
+# --------------------------------------------------
+COMMAND_PHRASES = [
+    "explain", "define", "describe", "tell", "tell me", "tell me about",
+    "what is", "what are", "can you explain", "can you tell",
+    "help me with", "give me", "show me"
+]
+
+# one alternation, longest phrase first, so "tell me about x" loses the
+# whole phrase instead of just "tell"
+COMMAND_RE = re.compile(
+    r"\b(?:" + "|".join(
+        re.escape(p) for p in sorted(COMMAND_PHRASES, key=len, reverse=True)
+    ) + r")\b"
+)
+SPACES_RE = re.compile(r"\s+")
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset("""
+a about above after again all am an and any are as at be because been before
+being below between both but by can could did do does doing down during each
+few for from further had has have having he her here hers him his how i if in
+into is it its itself just me more most my no nor not of off on once only or
+other our ours out over own please same she should so some such than that the
+their them then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your
+""".split())
+
+
+def normalize_question(question: str) -> str:
+    question = COMMAND_RE.sub("", question.lower())
+    return SPACES_RE.sub(" ", question).strip()
+
+
+# --------------------------------------------------
+# Tokens, stop words, light stemming
+# --------------------------------------------------
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """Strip the most common English inflections; deliberately light."""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("sses"):
+        return token[:-2]
+    if token.endswith("ing") and len(token) > 5:
+        return token[:-3]
+    if token.endswith("ed") and len(token) > 4:
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def analyze(text: str):
+    """Terms used for both indexing passages and matching queries."""
+    return [
+        stem(t) for t in TOKEN_RE.findall((text or "").lower())
+        if t not in STOP_WORDS
+    ]
+
+
+# --------------------------------------------------
+# Typo tolerance against the corpus vocabulary
+# --------------------------------------------------
+MIN_CORRECTABLE_LENGTH = 4
+
+
+def _deletes(term: str):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+class Vocabulary:
+    """Reference-counted set of indexed terms with single-edit lookups.
+
+    Uses a symmetric delete map (every term and its one-character deletes
+    point back at the term), so a misspelt query term is resolved with a
+    handful of dict lookups instead of comparing against every word.
+    Callers serialise access; the passage index holds its own lock.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._by_delete = {}
+
+    def __contains__(self, term):
+        return term in self._counts
+
+    def __len__(self):
+        return len(self._counts)
+
+    def add(self, term: str):
+        count = self._counts.get(term, 0)
+        self._counts[term] = count + 1
+        if count == 0 and len(term) >= MIN_CORRECTABLE_LENGTH:
+            for key in _deletes(term):
+                self._by_delete.setdefault(key, set()).add(term)
+
+    def discard(self, term: str):
+        count = self._counts.get(term)
+        if count is None:
+            return
+        if count > 1:
+            self._counts[term] = count - 1
+            return
+
+        del self._counts[term]
+        if len(term) >= MIN_CORRECTABLE_LENGTH:
+            for key in _deletes(term):
+                terms = self._by_delete.get(key)
+                if terms is not None:
+                    terms.discard(term)
+                    if not terms:
+                        del self._by_delete[key]
+
+    def clear(self):
+        self._counts.clear()
+        self._by_delete.clear()
+
+    def correct(self, term: str):
+        """Best vocabulary term within one edit of ``term``, else ``term``."""
+        if term in self._counts or len(term) < MIN_CORRECTABLE_LENGTH:
+            return term
+
+        candidates = set()
+        # insertion typo: a vocabulary term equals one of the query's deletes
+        for key in _deletes(term):
+            if key in self._counts:
+                candidates.add(key)
+            # substitution / transposition: both sides lose one character
+            candidates.update(self._by_delete.get(key, ()))
+        # deletion typo: the query is one of a vocabulary term's deletes
+        candidates.update(self._by_delete.get(term, ()))
+
+        if not candidates:
+            return term
+        return max(candidates, key=lambda c: (self._counts[c], c))
+
+
+def analyze_query(question: str, vocabulary: Vocabulary = None):
+    terms = analyze(normalize_question(question))
+    if vocabulary is not None:
+        terms = [vocabulary.correct(t) for t in terms]
+    return terms
@@ -0,0 +1,237 @@
+import heapq
+from itertools import groupby
+from operator import itemgetter
+import re
+import threading
+from dataclasses import dataclass
+
+from sqlalchemy import func
+
+from app.extension import db
+from app.models import File, FilePage
+from app.utils.answer_cache import answer_cache
+from app.utils.bm25 import BM25Postings, bm25_scores
+from app.utils.query_analyzer import analyze
+
+
+# Passages are overlapping word windows so an answer that straddles a
+# boundary still lands whole in at least one passage. Windows stay within a
+# page; offsets are into the pages joined with "\n".
+PASSAGE_WORDS = 120
+PASSAGE_OVERLAP = 30
+
+
+@dataclass
+class Passage:
+    id: int
+    file_id: int
+    filename: str
+    page: int
+    start: int
+    end: int
+    text: str
+    length: int
+    terms: tuple
+
+
+@dataclass
+class SearchHit:
+    passage: Passage
+    score: float
+
+
+def split_passages(text: str):
+    """Yield (start, end) character offsets of overlapping word windows."""
+    words = [m.span() for m in re.finditer(r"\S+", text or "")]
+    if not words:
+        return
+
+    step = PASSAGE_WORDS - PASSAGE_OVERLAP
+    for i in range(0, len(words), step):
+        window = words[i:i + PASSAGE_WORDS]
+        yield window[0][0], window[-1][1]
+        if i + PASSAGE_WORDS >= len(words):
+            break
+
+
+class PassageIndex:
+    """In-process BM25 inverted index over note passages.
+
+    Each worker keeps its own copy; ``sync`` compares a cheap signature of
+    the extracted rows in the ``file`` table with the last one it saw, so
+    uploads, finished extractions and deletes handled by other workers are
+    picked up on the next search.
+
+    ``_lock`` only guards the in-memory structures and is held briefly:
+    searches copy the postings they need and score outside it, and
+    ``sync`` reads the database before taking it.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._passages = {}
+        self._by_start = {}
+        self._postings = BM25Postings()
+        self._files = {}
+        self._versions = {}
+        self._seen_signature = None
+        self._next_id = 0
+
+    # --------------------------------------------------
+    # Mutation
+    # --------------------------------------------------
+    def add_file(self, file_id: int, filename: str, pages, version=None):
+        """Index ``pages``, an iterable of (page_number, text) in page order."""
+        with self._lock:
+            if file_id in self._files:
+                self.remove_file(file_id)
+
+            ids = []
+            offset = 0
+            for page_number, text in pages:
+                text = text or ""
+                for start, end in split_passages(text):
+                    tokens = analyze(text[start:end])
+                    # filename matches used to be a separate ilike, so fold
+                    # the name into the opening passage of the document
+                    if not ids:
+                        tokens = analyze(filename) + tokens
+                    if not tokens:
+                        continue
+
+                    pid = self._next_id
+                    self._next_id += 1
+                    counts = self._postings.add(pid, tokens)
+
+                    self._passages[pid] = Passage(
+                        id=pid,
+                        file_id=file_id,
+                        filename=filename,
+                        page=page_number,
+                        start=offset + start,
+                        end=offset + end,
+                        text=text[start:end],
+                        length=len(tokens),
+                        terms=tuple(counts),
+                    )
+                    self._by_start[(file_id, offset + start)] = pid
+                    ids.append(pid)
+
+                offset += len(text) + 1
+
+            self._files[file_id] = ids
+            self._versions[file_id] = version
+
+    def remove_file(self, file_id: int):
+        with self._lock:
+            self._versions.pop(file_id, None)
+            for pid in self._files.pop(file_id, []):
+                passage = self._passages.pop(pid)
+                del self._by_start[(file_id, passage.start)]
+                self._postings.remove(pid)
+
+    def passage_at(self, file_id: int, start: int):
+        with self._lock:
+            pid = self._by_start.get((file_id, start))
+            return self._passages[pid] if pid is not None else None
+
+    def iter_passages(self):
+        """Snapshot of (file_id, start, end, text) for every passage."""
+        with self._lock:
+            passages = list(self._passages.values())
+        return [(p.file_id, p.start, p.end, p.text) for p in passages]
+
+    def clear(self):
+        with self._lock:
+            self._passages.clear()
+            self._by_start.clear()
+            self._postings.clear()
+            self._files.clear()
+            self._versions.clear()
+            self._seen_signature = None
+
+    # --------------------------------------------------
+    # Keeping in step with the database
+    # --------------------------------------------------
+    def sync(self):
+        done = File.extraction_status == "done"
+        signature = tuple(db.session.query(
+            func.count(File.id), func.max(File.id), func.max(File.extracted_at)
+        ).filter(done).one())
+        if signature == self._seen_signature:
+            return
+
+        # one sync at a time, so two can't interleave their adds and
+        # removes; searches only wait for the brief add_file/remove_file
+        with self._sync_lock:
+            self._sync(signature)
+
+    def _sync(self, signature):
+        if signature == self._seen_signature:
+            return  # synced by the thread we waited for
+
+        # read after the signature, so the index ends up at least as new
+        # as the signature it records
+        done = File.extraction_status == "done"
+        versions = dict(db.session.query(File.id, File.extracted_at).filter(done))
+        with self._lock:
+            indexed = dict(self._versions)
+        stale = [
+            file_id for file_id, version in versions.items()
+            if file_id not in indexed or indexed[file_id] != version
+        ]
+
+        # deleted or re-extracted through another worker: cached
+        # answers here may still quote the old text (or a reused id)
+        for file_id in set(indexed) - set(versions):
+            self.remove_file(file_id)
+            answer_cache.invalidate_file(file_id)
+        for file_id in stale:
+            if file_id in indexed:
+                answer_cache.invalidate_file(file_id)
+        for i in range(0, len(stale), 200):
+            batch = stale[i:i + 200]
+            names = dict(db.session.query(File.id, File.filename).filter(File.id.in_(batch)))
+
+            # stream pages file by file rather than whole documents
+            rows = db.session.query(FilePage.file_id, FilePage.page_number, FilePage.text)\
+                .filter(FilePage.file_id.in_(batch))\
+                .order_by(FilePage.file_id, FilePage.page_number)\
+                .yield_per(500)
+            loaded = set()
+            for file_id, group in groupby(rows, key=itemgetter(0)):
+                # read the file's pages before add_file takes the lock
+                pages = [(page_number, text) for _, page_number, text in group]
+                self.add_file(file_id, names[file_id], pages, version=versions[file_id])
+                loaded.add(file_id)
+
+            for file_id in batch:
+                if file_id not in loaded:
+                    self.add_file(file_id, names[file_id], (), version=versions[file_id])
+
+        self._seen_signature = signature
+
+    # --------------------------------------------------
+    # Query
+    # --------------------------------------------------
+    def search(self, query: str, k: int = 3):
+        with self._lock:
+            # copies, so scoring can run while other requests search or
+            # files are added and removed
+            _, postings, n, avg_length = self._postings.snapshot(query)
+        if not postings:
+            return []
+
+        scores = bm25_scores(postings, n, avg_length)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+        with self._lock:
+            # a passage removed since the copy is simply skipped
+            return [
+                SearchHit(self._passages[pid], score)
+                for pid, score in best if pid in self._passages
+            ]
+
+
+passage_index = PassageIndex()
@@ -0,0 +1,264 @@
+import os
+import tempfile
+import threading
+from urllib.parse import quote
+
+from flask import Response, current_app, redirect, request, send_file
+
+
+# File.storage_path / StoredBlob.storage_path hold either a local path or
+# an "s3://bucket/key" URL, so the backend for a stored file follows its
+# path and existing local files keep working after switching to S3.
+S3_SCHEME = "s3://"
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+# --------------------------------------------------
+# Local disk (UPLOAD_FOLDER)
+# --------------------------------------------------
+class LocalStorage:
+    def __init__(self, root: str, sendfile_mode: str = None, accel_prefix: str = "/protected-uploads/"):
+        self.root = root
+        # "accel": nginx serves the bytes via X-Accel-Redirect to
+        # ``accel_prefix`` (an internal location aliased to ``root``).
+        # "sendfile" is Flask's own USE_X_SENDFILE and needs nothing here.
+        self.sendfile_mode = sendfile_mode
+        self.accel_prefix = accel_prefix
+
+    def save(self, temp_path: str, key: str, content_type: str = None) -> str:
+        """Move a finished temp file into storage; returns its storage path."""
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, key)
+        os.replace(temp_path, path)
+        return path
+
+    def delete(self, path: str):
+        if os.path.exists(path):
+            os.remove(path)
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(path)
+
+    def fetch(self, path: str):
+        """A local path to read ``path`` from, and whether it's a temp copy."""
+        return path, False
+
+    def send(self, path: str, filename: str, mimetype: str = None, etag: str = None, last_modified=None):
+        """Download response; answers Range with 206 and revalidation with 304.
+
+        ``etag`` should be the content hash: identical bytes, identical tag.
+        """
+        relative = os.path.relpath(os.path.abspath(path), os.path.abspath(self.root))
+        if self.sendfile_mode == "accel" and not relative.startswith(".."):
+            rv = current_app.response_class(mimetype=mimetype)
+            rv.headers.set("Content-Disposition", "attachment", filename=filename)
+            if etag:
+                rv.set_etag(etag)
+            rv.last_modified = last_modified or os.path.getmtime(path)
+            rv.cache_control.private = True
+            rv.cache_control.no_cache = True
+            # 304s are answered here; nginx does ranges on the real bytes
+            rv.make_conditional(request)
+            if rv.status_code == 200:
+                rv.headers["X-Accel-Redirect"] = self.accel_prefix + quote(relative.replace(os.sep, "/"))
+            return rv
+
+        rv = send_file(
+            path,
+            as_attachment=True,
+            download_name=filename,
+            mimetype=mimetype,
+            conditional=True,
+            etag=etag or True,
+            last_modified=last_modified
+        )
+        # behind login: browsers may keep it, shared caches may not
+        rv.cache_control.private = True
+        # werkzeug only says so on 206s; PDF viewers look for it on the 200
+        rv.accept_ranges = "bytes"
+        return rv
+
+
+# --------------------------------------------------
+# S3 / MinIO (boto3)
+# --------------------------------------------------
+class S3Storage:
+    def __init__(self, bucket, endpoint_url=None, access_key=None, secret_key=None,
+                 region=None, key_prefix="", addressing_style=None,
+                 multipart_threshold=8 * 1024 * 1024, multipart_chunksize=8 * 1024 * 1024,
+                 max_concurrency=10, presign_expires=300, presigned_downloads=True):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.key_prefix = key_prefix
+        self.addressing_style = addressing_style
+        self.multipart_threshold = multipart_threshold
+        self.multipart_chunksize = multipart_chunksize
+        self.max_concurrency = max_concurrency
+        self.presign_expires = presign_expires
+        self.presigned_downloads = presigned_downloads
+        self._client = None
+        self._transfer_config = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is not None:
+            return self._client
+
+        with self._lock:
+            if self._client is None:
+                import boto3
+                from boto3.s3.transfer import TransferConfig
+                from botocore.config import Config
+
+                self._client = boto3.session.Session().client(
+                    "s3",
+                    endpoint_url=self.endpoint_url,
+                    aws_access_key_id=self.access_key,
+                    aws_secret_access_key=self.secret_key,
+                    region_name=self.region,
+                    config=Config(
+                        # one connection per concurrent multipart part
+                        max_pool_connections=max(10, self.max_concurrency * 2),
+                        retries={"max_attempts": 5, "mode": "adaptive"},
+                        s3={"addressing_style": self.addressing_style or "auto"},
+                    )
+                )
+                self._transfer_config = TransferConfig(
+                    multipart_threshold=self.multipart_threshold,
+                    multipart_chunksize=self.multipart_chunksize,
+                    max_concurrency=self.max_concurrency,
+                    use_threads=True
+                )
+        return self._client
+
+    def _split(self, path: str):
+        bucket, _, key = path[len(S3_SCHEME):].partition("/")
+        return bucket, key
+
+    def save(self, temp_path: str, key: str, content_type: str = None) -> str:
+        client = self._get_client()
+        key = f"{self.key_prefix}{key}"
+        client.upload_file(
+            temp_path, self.bucket, key,
+            ExtraArgs={"ContentType": content_type} if content_type else None,
+            Config=self._transfer_config
+        )
+        os.remove(temp_path)
+        return f"{S3_SCHEME}{self.bucket}/{key}"
+
+    def delete(self, path: str):
+        bucket, key = self._split(path)
+        self._get_client().delete_object(Bucket=bucket, Key=key)
+
+    def exists(self, path: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        bucket, key = self._split(path)
+        try:
+            self._get_client().head_object(Bucket=bucket, Key=key)
+        except ClientError:
+            return False
+        return True
+
+    def fetch(self, path: str):
+        """Download to a temp file with parallel ranged GETs; caller removes it."""
+        client = self._get_client()
+        bucket, key = self._split(path)
+        fd, local_path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            client.download_file(bucket, key, local_path, Config=self._transfer_config)
+        except Exception:
+            os.remove(local_path)
+            raise
+        return local_path, True
+
+    def send(self, path: str, filename: str, mimetype: str = None, etag: str = None, last_modified=None):
+        # S3 serves ranges and its own ETag for presigned GETs
+        client = self._get_client()
+        bucket, key = self._split(path)
+        disposition = f'attachment; filename="{filename}"'
+
+        if self.presigned_downloads:
+            # the browser fetches the bytes from S3 directly
+            params = {"Bucket": bucket, "Key": key, "ResponseContentDisposition": disposition}
+            if mimetype:
+                params["ResponseContentType"] = mimetype
+            url = client.generate_presigned_url(
+                "get_object", Params=params, ExpiresIn=self.presign_expires
+            )
+            return redirect(url, code=302)
+
+        # bucket not reachable by clients: stream it through without buffering
+        obj = client.get_object(Bucket=bucket, Key=key)
+        body = obj["Body"]
+
+        def generate():
+            try:
+                for chunk in body.iter_chunks(STREAM_CHUNK_SIZE):
+                    yield chunk
+            finally:
+                body.close()
+
+        return Response(
+            generate(),
+            mimetype=mimetype or obj.get("ContentType"),
+            headers={
+                "Content-Length": str(obj["ContentLength"]),
+                "Content-Disposition": disposition,
+            }
+        )
+
+
+# --------------------------------------------------
+# Backend selection
+# --------------------------------------------------
+class StorageBackends:
+    def __init__(self):
+        self.local = None
+        self.s3 = None
+        self.default = None
+
+    def init_app(self, app):
+        self.local = LocalStorage(
+            app.config.get("UPLOAD_FOLDER", "uploads"),
+            sendfile_mode=app.config.get("FILE_SENDFILE_MODE"),
+            accel_prefix=app.config.get("FILE_ACCEL_PREFIX", "/protected-uploads/")
+        )
+        self.s3 = None
+        if app.config.get("S3_BUCKET"):
+            self.s3 = S3Storage(
+                bucket=app.config["S3_BUCKET"],
+                endpoint_url=app.config.get("S3_ENDPOINT_URL"),
+                access_key=app.config.get("S3_ACCESS_KEY"),
+                secret_key=app.config.get("S3_SECRET_KEY"),
+                region=app.config.get("S3_REGION"),
+                key_prefix=app.config.get("S3_KEY_PREFIX", ""),
+                addressing_style=app.config.get("S3_ADDRESSING_STYLE"),
+                multipart_threshold=app.config.get("S3_MULTIPART_THRESHOLD"),
+                multipart_chunksize=app.config.get("S3_MULTIPART_CHUNKSIZE"),
+                max_concurrency=app.config.get("S3_MAX_CONCURRENCY"),
+                presign_expires=app.config.get("S3_PRESIGN_EXPIRES"),
+                presigned_downloads=app.config.get("S3_PRESIGNED_DOWNLOADS", True),
+            )
+
+        if app.config.get("USE_S3"):
+            if self.s3 is None:
+                raise RuntimeError("USE_S3 is set but S3_BUCKET is not")
+            self.default = self.s3
+        else:
+            self.default = self.local
+
+    def for_path(self, path: str):
+        if path.startswith(S3_SCHEME):
+            if self.s3 is None:
+                raise RuntimeError(f"{path} is in S3 but S3_BUCKET is not configured")
+            return self.s3
+        return self.local
+
+
+storage = StorageBackends()
+
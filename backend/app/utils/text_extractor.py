@@ -2,25 +2,84 @@ import os
 import fitz  # PyMuPDF
 from docx import Document
 
+# Bump whenever extraction output changes; cached results are keyed on it.
+EXTRACTOR_VERSION = "2"
 
-def extract_text_from_file(path: str) -> str:
+
+def extract_pages(path: str) -> list:
+    """Text of each page, in order; raises on unreadable files so callers can retry.
+
+    DOCX has no fixed pages, so the whole document comes back as one.
+    """
     ext = os.path.splitext(path)[1].lower()
 
+    # -------- PDF --------
+    if ext == ".pdf":
+        return extract_page_range(path, 0, None)
+
+    # -------- DOCX --------
+    elif ext == ".docx":
+        doc = Document(path)
+        return ["\n".join(p.text for p in doc.paragraphs).strip()]
+
+    return []
+
+
+# --------------------------------------------------
+# Parallel PDF extraction
+# --------------------------------------------------
+def extract_page_range(path: str, start: int, stop=None) -> list:
+    """Text of PDF pages ``start`` up to ``stop`` (0-based, exclusive).
+
+    Opens the document itself, so each process pool worker can take a
+    slice of the same file.
+    """
+    with fitz.open(path) as doc:
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        return [doc[n].get_text().strip() for n in range(start, stop)]
+
+
+def page_ranges(path: str, parts: int, min_pages: int):
+    """Split a PDF into up to ``parts`` contiguous (start, stop) page ranges.
+
+    Returns None when the file should be extracted in one piece: it is not
+    a PDF, has fewer than ``min_pages`` pages, or cannot be opened (the
+    single-piece extraction then reports the error).
+    """
+    if parts < 2 or os.path.splitext(path)[1].lower() != ".pdf":
+        return None
+
     try:
-        # -------- PDF --------
-        if ext == ".pdf":
-            text = ""
-            with fitz.open(path) as doc:
-                for page in doc:
-                    text += page.get_text()
-            return text.strip()
-
-        # -------- DOCX --------
-        elif ext == ".docx":
-            doc = Document(path)
-            return "\n".join(p.text for p in doc.paragraphs).strip()
-
-    except Exception as e:
-        print("❌ TEXT EXTRACTION ERROR:", e)
-
-    return ""
+        with fitz.open(path) as doc:
+            count = doc.page_count
+    except Exception:
+        return None
+
+    if count < max(min_pages, 2):
+        return None
+
+    parts = min(parts, count)
+    size, extra = divmod(count, parts)
+    ranges = []
+    start = 0
+    for n in range(parts):
+        stop = start + size + (1 if n < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def submit_extraction(executor, path: str, parts: int, min_pages: int) -> list:
+    """Queue extraction of ``path`` on ``executor``; returns futures in page order.
+
+    Concatenating the futures' results gives the same pages as
+    ``extract_pages``.
+    """
+    ranges = page_ranges(path, parts, min_pages)
+    if ranges is None:
+        return [executor.submit(extract_pages, path)]
+    return [executor.submit(extract_page_range, path, start, stop) for start, stop in ranges]
+
+
+def merge_pages(futures) -> list:
+    return [page for future in futures for page in future.result()]
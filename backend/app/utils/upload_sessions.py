@@ -0,0 +1,166 @@
+import hashlib
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from app.extension import db
+from app.models import UploadSession
+from app.utils.blob_store import CHUNK_SIZE
+
+
+# Running sha256 per session, kept while chunks arrive in order at this
+# worker. hashlib objects can't be stored, so a session resumed on another
+# worker (or after a restart) is hashed from disk once at finalize instead.
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+class OffsetMismatch(Exception):
+    def __init__(self, expected: int):
+        super().__init__(f"expected offset {expected}")
+        self.expected = expected
+
+
+def start_session(user_id: int, filename: str, mimetype: str, size: int, upload_dir: str):
+    os.makedirs(upload_dir, exist_ok=True)
+    session_id = uuid.uuid4().hex
+    temp_path = os.path.join(upload_dir, f".{session_id}.part")
+    open(temp_path, "wb").close()
+
+    session = UploadSession(
+        id=session_id,
+        user_id=user_id,
+        filename=filename,
+        mimetype=mimetype,
+        size=size,
+        received=0,
+        temp_path=temp_path
+    )
+    db.session.add(session)
+
+    with _digests_lock:
+        _digests[session_id] = (0, hashlib.sha256())
+    return session
+
+
+# --------------------------------------------------
+# Append a chunk (commits the new offset)
+# --------------------------------------------------
+def _lock_file(f):
+    # exclusive until ``f`` is closed; covers other workers on this host.
+    # Without fcntl (Windows dev) the row lock below is all there is.
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def append_chunk(session, offset: int, stream):
+    """Write ``stream`` at ``offset``; returns the new offset.
+
+    Bytes read before a dropped connection are kept and committed, so the
+    client resumes from wherever the body was cut off.
+    """
+    if offset != session.received:
+        raise OffsetMismatch(session.received)
+
+    written = 0
+    error = None
+    with open(session.temp_path, "r+b") as out:
+        # a concurrent PUT may have moved the session on since it was
+        # loaded: lock, then re-check the committed offset before touching
+        # the file, or a stale request would truncate committed bytes
+        _lock_file(out)
+        received = db.session.query(UploadSession.received)\
+            .filter_by(id=session.id)\
+            .with_for_update()\
+            .scalar()
+        if received != offset:
+            db.session.rollback()
+            db.session.refresh(session)
+            raise OffsetMismatch(session.received)
+
+        # the stored digest is only replaced once the new offset commits
+        with _digests_lock:
+            state = _digests.get(session.id)
+        digest = state[1].copy() if state and state[0] == offset else None
+
+        # drop anything past the last committed offset (an earlier
+        # request that failed before it could record its progress)
+        out.seek(offset)
+        out.truncate()
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if offset + written + len(chunk) > session.size:
+                    chunk = chunk[:session.size - offset - written]
+                    error = ValueError("chunk runs past the declared size")
+                out.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+                written += len(chunk)
+                if error:
+                    break
+        except Exception as e:
+            error = e
+        out.flush()
+
+        new_offset = offset + written
+        updated = UploadSession.query\
+            .filter_by(id=session.id, received=offset)\
+            .update({"received": new_offset, "updated_at": datetime.utcnow()})
+        db.session.commit()
+
+    if not updated:
+        # another request moved the session on; its bytes win
+        db.session.refresh(session)
+        raise OffsetMismatch(session.received)
+
+    with _digests_lock:
+        if digest is not None:
+            _digests[session.id] = (new_offset, digest)
+        else:
+            _digests.pop(session.id, None)
+
+    if error:
+        raise error
+    return new_offset
+
+
+def session_digest(session) -> str:
+    """sha256 of the complete upload."""
+    with _digests_lock:
+        state = _digests.pop(session.id, None)
+    if state and state[0] == session.received:
+        return state[1].hexdigest()
+
+    digest = hashlib.sha256()
+    with open(session.temp_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --------------------------------------------------
+# Cleanup
+# --------------------------------------------------
+def discard_session(session):
+    """Delete the session row and its partial file (caller commits)."""
+    with _digests_lock:
+        _digests.pop(session.id, None)
+    db.session.delete(session)
+    if os.path.exists(session.temp_path):
+        os.remove(session.temp_path)
+
+
+def expire_sessions(ttl_seconds: int):
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    for session in UploadSession.query.filter(UploadSession.updated_at < cutoff):
+        discard_session(session)
+    db.session.commit()
@@ -0,0 +1,144 @@
+import csv
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.extension import db
+from app.models import User
+from app.utils.password_hasher import password_hasher
+
+
+REQUIRED_COLUMNS = ("name", "email", "password")
+IMPORT_ROLES = ("student", "teacher")
+
+
+def _check_row(row, default_role):
+    """(name, email, password, role) or an error message; same rules as /register."""
+    name = (row.get("name") or "").strip()
+    email = (row.get("email") or "").strip().lower()
+    password = row.get("password") or ""
+    role = (row.get("role") or "").strip().lower() or default_role
+
+    if not name or not email or not password:
+        return "missing required fields"
+    if len(password) < 8:
+        return "password must be at least 8 characters"
+    if role not in IMPORT_ROLES:
+        return "invalid role"
+    return name, email, password, role
+
+
+def _existing_emails(emails):
+    # one IN query per batch, answered from ix_user_email
+    return {
+        email for (email,) in
+        db.session.query(User.email).filter(User.email.in_(emails))
+    }
+
+
+# --------------------------------------------------
+# Import a CSV stream (name,email,password[,role])
+# --------------------------------------------------
+def count_rows(stream):
+    """Data rows in a CSV text stream (header and blank lines excluded); rewinds it."""
+    rows = sum(1 for row in csv.reader(stream) if row)
+    stream.seek(0)
+    return max(0, rows - 1)
+
+
+def import_users(stream, batch_size=500, default_role="student"):
+    """Create users from CSV, committing every ``batch_size`` valid rows.
+
+    Rows are read as they arrive, so the file is never held in memory.
+    Returns ``{"created": n, "errors": [{"row", "email", "error"}]}`` with
+    CSV line numbers; rows with errors are skipped, the rest still go in.
+
+    Batches commit in file order. If one fails (database error, hashing
+    backlog), the import stops and the report gains
+    ``"aborted": {"row", "error"}``: ``created`` users from rows before
+    that line are committed, nothing from that line on was imported, so
+    the file can be re-run from there.
+    """
+    reader = csv.DictReader(stream)
+    missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"missing column(s): {', '.join(missing)}")
+
+    report = {"created": 0, "errors": []}
+    seen = set()
+    batch = []
+
+    for row in reader:
+        line = reader.line_num
+        checked = _check_row(row, default_role)
+        if isinstance(checked, str):
+            report["errors"].append({"row": line, "email": row.get("email"), "error": checked})
+            continue
+        if checked[1] in seen:
+            report["errors"].append({"row": line, "email": checked[1], "error": "duplicate email in file"})
+            continue
+
+        seen.add(checked[1])
+        batch.append((line, checked))
+        if len(batch) >= batch_size:
+            if not _commit_batch(batch, report):
+                break
+            batch = []
+    else:
+        if batch:
+            _commit_batch(batch, report)
+
+    report["errors"].sort(key=lambda e: e["row"])
+    return report
+
+
+def _commit_batch(batch, report):
+    first_row = batch[0][0]
+    try:
+        _insert_batch(batch, report)
+    except Exception as e:
+        print("❌ USER IMPORT ERROR:", e)
+        db.session.rollback()
+        # a re-run from first_row will report the rest again
+        report["errors"] = [error for error in report["errors"] if error["row"] < first_row]
+        report["aborted"] = {"row": first_row, "error": str(e) or type(e).__name__}
+        return False
+    return True
+
+
+def _insert_batch(batch, report):
+    existing = _existing_emails([email for _, (_, email, _, _) in batch])
+    fresh = []
+    for line, checked in batch:
+        if checked[1] in existing:
+            report["errors"].append({"row": line, "email": checked[1], "error": "email already registered"})
+        else:
+            fresh.append((line, checked))
+    if not fresh:
+        return
+
+    hashes = password_hasher.hash_many(password for _, (_, _, password, _) in fresh)
+    now = datetime.utcnow()
+    rows = [
+        {"name": name, "email": email, "password_hash": pwhash, "role": role, "created_at": now}
+        for (_, (name, email, _, role)), pwhash in zip(fresh, hashes)
+    ]
+
+    try:
+        db.session.execute(insert(User), rows)
+        db.session.commit()
+    except IntegrityError:
+        # someone registered one of these emails since the check; drop
+        # those rows and insert the rest
+        db.session.rollback()
+        taken = _existing_emails([row["email"] for row in rows])
+        for (line, (_, email, _, _)) in fresh:
+            if email in taken:
+                report["errors"].append({"row": line, "email": email, "error": "email already registered"})
+        rows = [row for row in rows if row["email"] not in taken]
+        if rows:
+            db.session.execute(insert(User), rows)
+            db.session.commit()
+
+    report["created"] += len(rows)
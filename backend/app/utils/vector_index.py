@@ -0,0 +1,270 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from app.utils.query_analyzer import analyze
+
+
+# Terms are hashed into a fixed space for document frequencies, then each
+# weighted term is folded into ``dims`` signed buckets. The signed fold is a
+# random projection of the sparse TF-IDF vector, so cosine similarity in the
+# small dense space approximates cosine over the full vocabulary while the
+# whole matrix stays a plain float32 array that can be memory-mapped.
+TERM_BUCKETS = 1 << 20
+DEFAULT_DIMS = 256
+
+CURRENT_FILE = "CURRENT"
+META_DTYPE = np.dtype([("file_id", "<i8"), ("start", "<i8"), ("end", "<i8")])
+
+
+@lru_cache(maxsize=262144)
+def _term_slots(term: str):
+    h = int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+    return h & (TERM_BUCKETS - 1), h >> 20, 1.0 if h >> 63 else -1.0
+
+
+class VectorIndex:
+    """TF-IDF passage vectors persisted as memory-mapped ``.npy`` files.
+
+    A build writes a fresh directory and then atomically repoints the
+    ``CURRENT`` file at it; every worker maps the same read-only pages and
+    picks up a new build on its first query after ``reload_interval``
+    seconds (the pointer is not re-read on every query).
+    """
+
+    def __init__(self, directory=None, dims=DEFAULT_DIMS, reload_interval=5.0):
+        self.directory = directory
+        self.dims = dims
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._loaded = None
+        self._vectors = None
+        self._meta = None
+        self._idf = None
+        self._rows = None
+
+    def init_app(self, app):
+        self.directory = app.config.get("VECTOR_INDEX_DIR", self.directory)
+        self.dims = app.config.get("VECTOR_INDEX_DIMS", self.dims)
+        self.reload_interval = app.config.get("VECTOR_INDEX_RELOAD_INTERVAL", self.reload_interval)
+
+    # --------------------------------------------------
+    # Vectorizing
+    # --------------------------------------------------
+    def _embed(self, token_lists, idf, dims):
+        rows, buckets, cols, signs, tfs = [], [], [], [], []
+        for row, tokens in enumerate(token_lists):
+            for term, tf in Counter(tokens).items():
+                bucket, mixed, sign = _term_slots(term)
+                rows.append(row)
+                buckets.append(bucket)
+                cols.append(mixed % dims)
+                signs.append(sign)
+                tfs.append(tf)
+
+        matrix = np.zeros((len(token_lists), dims), dtype=np.float32)
+        if rows:
+            weights = (
+                np.array(signs, dtype=np.float32)
+                * (1.0 + np.log(np.array(tfs, dtype=np.float32)))
+                * idf[np.array(buckets)]
+            )
+            np.add.at(matrix, (np.array(rows), np.array(cols)), weights)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def vectorize(self, texts):
+        if not self._ensure_loaded():
+            raise RuntimeError("vector index has not been built")
+        return self._embed([analyze(t) for t in texts], self._idf, self._vectors.shape[1])
+
+    # --------------------------------------------------
+    # Building
+    # --------------------------------------------------
+    def build(self, passages, batch_size=4096):
+        """Build from ``(file_id, start, end, text)`` tuples and publish it."""
+        meta = []
+        token_lists = []
+        df = np.zeros(TERM_BUCKETS, dtype=np.int32)
+
+        for file_id, start, end, text in passages:
+            tokens = analyze(text)
+            meta.append((file_id, start, end))
+            token_lists.append(tokens)
+            buckets = {_term_slots(t)[0] for t in tokens}
+            if buckets:
+                df[np.fromiter(buckets, dtype=np.int64)] += 1
+
+        n = len(meta)
+        idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"build-{time.time_ns()}"
+        target = os.path.join(self.directory, name)
+        os.makedirs(target)
+
+        vectors = np.lib.format.open_memmap(
+            os.path.join(target, "vectors.npy"), mode="w+",
+            dtype=np.float32, shape=(n, self.dims)
+        )
+        for i in range(0, n, batch_size):
+            vectors[i:i + batch_size] = self._embed(token_lists[i:i + batch_size], idf, self.dims)
+        vectors.flush()
+        del vectors
+
+        np.save(os.path.join(target, "meta.npy"), np.array(meta, dtype=META_DTYPE))
+        np.save(os.path.join(target, "idf.npy"), idf)
+
+        pointer = os.path.join(self.directory, CURRENT_FILE + ".tmp")
+        with open(pointer, "w") as f:
+            f.write(name)
+        os.replace(pointer, os.path.join(self.directory, CURRENT_FILE))
+        self._checked_at = None  # this worker switches over straight away
+
+        # older builds may still be mapped by other workers; unlinking is
+        # safe on POSIX, the pages live until the last mapping goes away
+        for entry in os.listdir(self.directory):
+            if entry.startswith("build-") and entry != name:
+                shutil.rmtree(os.path.join(self.directory, entry), ignore_errors=True)
+
+        return n
+
+    # --------------------------------------------------
+    # Loading
+    # --------------------------------------------------
+    def _ensure_loaded(self):
+        if not self.directory:
+            return False
+
+        now = time.monotonic()
+        checked_at = self._checked_at
+        if checked_at is not None and now - checked_at < self.reload_interval:
+            return self._loaded is not None
+        self._checked_at = now
+
+        try:
+            with open(os.path.join(self.directory, CURRENT_FILE)) as f:
+                name = f.read().strip()
+        except OSError:
+            return self._loaded is not None
+
+        if name == self._loaded:
+            return True
+
+        with self._lock:
+            if name == self._loaded:
+                return True
+            target = os.path.join(self.directory, name)
+            try:
+                vectors = np.load(os.path.join(target, "vectors.npy"), mmap_mode="r")
+                meta = np.load(os.path.join(target, "meta.npy"))
+                idf = np.load(os.path.join(target, "idf.npy"), mmap_mode="r")
+            except OSError as e:
+                print("VECTOR INDEX LOAD ERROR:", e)
+                return self._loaded is not None
+
+            self._vectors, self._meta, self._idf = vectors, meta, idf
+            self._rows = {
+                (int(f), int(s)): i
+                for i, (f, s) in enumerate(zip(meta["file_id"], meta["start"]))
+            }
+            self._loaded = name
+            return True
+
+    @property
+    def available(self):
+        return self._ensure_loaded()
+
+    # --------------------------------------------------
+    # Query
+    # --------------------------------------------------
+    def search_batch(self, queries, k=10, chunk_rows=65536):
+        """Top ``k`` (file_id, start, end, score) per query, one matmul pass."""
+        if not queries or not self._ensure_loaded():
+            return [[] for _ in queries]
+
+        q = self.vectorize(queries)
+        vectors, meta = self._vectors, self._meta
+        n = vectors.shape[0]
+        k = min(k, n)
+        if k == 0:
+            return [[] for _ in queries]
+
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+
+        # chunk over the matrix so only a slice of pages is hot at a time
+        for offset in range(0, n, chunk_rows):
+            scores = q @ vectors[offset:offset + chunk_rows].T
+            take = min(k, scores.shape[1])
+            top = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            best_rows = np.concatenate([best_rows, top + offset], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        results = []
+        for scores, rows in zip(best_scores, best_rows):
+            order = np.argsort(-scores)
+            results.append([
+                (int(meta[r]["file_id"]), int(meta[r]["start"]), int(meta[r]["end"]), float(s))
+                for r, s in zip(rows[order], scores[order])
+                if s > 0
+            ])
+        return results
+
+    def search(self, query: str, k=10):
+        return self.search_batch([query], k)[0]
+
+    def similarities(self, query: str, passages):
+        """Cosine similarity of ``query`` to each passage.
+
+        Stored vectors are used when the passage was part of the last build;
+        newer passages are vectorized on the fly with the stored IDF.
+        """
+        q = self.vectorize([query])[0]
+        rows, fresh = [], []
+        for i, p in enumerate(passages):
+            row = self._rows.get((p.file_id, p.start))
+            if row is None:
+                fresh.append(i)
+            else:
+                rows.append((i, row))
+
+        scores = np.zeros(len(passages), dtype=np.float32)
+        if rows:
+            idx, matrix_rows = zip(*rows)
+            scores[list(idx)] = self._vectors[list(matrix_rows)] @ q
+        if fresh:
+            scores[fresh] = self.vectorize([passages[i].text for i in fresh]) @ q
+        return scores
+
+    def rerank(self, query: str, hits, keyword_weight=0.5):
+        """Blend normalised keyword scores with vector similarity."""
+        if not hits or not self._ensure_loaded():
+            return hits
+
+        cosine = self.similarities(query, [h.passage for h in hits])
+        top = max(h.score for h in hits) or 1.0
+        blended = [
+            (keyword_weight * h.score / top + (1 - keyword_weight) * float(c), h)
+            for h, c in zip(hits, cosine)
+        ]
+        blended.sort(key=lambda item: item[0], reverse=True)
+        for score, h in blended:
+            h.score = score
+        return [h for _, h in blended]
+
+
+vector_index = VectorIndex()
@@ -0,0 +1,76 @@
+"""Serial vs page-range parallel text extraction on generated PDFs.
+
+    cd backend && python benchmarks/bench_parallel_extraction.py [workers] [pages ...]
+
+Defaults to one worker per core and 200, 400 and 800 page documents of
+dense slide-like text.
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.text_extractor import extract_pages, merge_pages, submit_extraction
+
+
+WORDS = (
+    "cell membrane protein energy enzyme reaction gradient transport "
+    "photosynthesis respiration glucose oxygen carbon nucleus gene "
+    "mitosis meiosis chromosome evolution selection population"
+).split()
+
+
+def make_pdf(path, pages, rng):
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        lines = [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(45)]
+        page.insert_text((40, 40), f"Lecture slide {n + 1}\n" + "\n".join(lines), fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 2
+    sizes = [int(a) for a in sys.argv[2:]] or [200, 400, 800]
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as directory, ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        # start every worker before timing anything
+        list(pool.map(abs, range(workers * 4)))
+
+        print(f"{workers} workers")
+        print(f"{'pages':>6} {'serial ms':>12} {'parallel ms':>12} {'speedup':>8}")
+        for pages in sizes:
+            path = os.path.join(directory, f"slides-{pages}.pdf")
+            make_pdf(path, pages, rng)
+
+            serial, serial_time = timed(lambda: extract_pages(path))
+            parallel, parallel_time = timed(
+                lambda: merge_pages(submit_extraction(pool, path, workers, min_pages=2))
+            )
+            assert parallel == serial, "page order or text differs"
+
+            print(
+                f"{pages:>6} {serial_time * 1000:>12.1f} {parallel_time * 1000:>12.1f}"
+                f" {serial_time / parallel_time:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Per-query cost of chat question analysis, before and after the
+precompiled query analyzer.
+
+    cd backend && python benchmarks/bench_query_analyzer.py
+"""
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.query_analyzer import Vocabulary, analyze, analyze_query, normalize_question
+
+
+QUESTIONS = [
+    "Explain photosynthesis",
+    "Can you explain the causes of the French Revolution?",
+    "tell me about newton's laws of motion",
+    "What is the difference between mitosis and meiosis",
+    "help me with integration by parts",
+    "Describe the structure of an atom",
+    "show me examples of photosyntesis in deserts",
+    "what are enzymes and how do they lower activation energy",
+]
+
+
+def legacy_normalize_question(question: str):
+    # chat_routes.normalize_question as it was before the analyzer
+    question = question.lower()
+
+    command_words = [
+        "explain", "define", "describe", "tell", "tell me", "tell me about",
+        "what is", "what are", "can you explain", "can you tell",
+        "help me with", "give me", "show me"
+    ]
+
+    for cmd in command_words:
+        question = re.sub(rf"\b{cmd}\b", "", question, flags=re.IGNORECASE)
+
+    question = re.sub(r"\s+", " ", question).strip()
+    return question
+
+
+def build_vocabulary(size=50000):
+    rng = random.Random(7)
+    vocabulary = Vocabulary()
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    for _ in range(size):
+        vocabulary.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 12))))
+    for question in QUESTIONS:
+        for term in analyze(question):
+            vocabulary.add(term)
+    return vocabulary
+
+
+def per_query_us(fn, number=20000):
+    seconds = timeit.timeit(lambda: [fn(q) for q in QUESTIONS], number=number // len(QUESTIONS))
+    return seconds / number * 1e6
+
+
+def main():
+    # the regex module caches compiled patterns, which flatters the legacy
+    # loop; purge between runs to show the cold per-pattern cost as well
+    legacy_warm = per_query_us(legacy_normalize_question)
+
+    def legacy_cold(q):
+        re.purge()
+        return legacy_normalize_question(q)
+
+    legacy_cold_us = per_query_us(legacy_cold, number=2000)
+    normalize_us = per_query_us(normalize_question)
+    analyze_us = per_query_us(analyze_query)
+
+    vocabulary = build_vocabulary()
+    typo_us = per_query_us(lambda q: analyze_query(q, vocabulary))
+
+    print(f"legacy normalize_question (re cache warm) {legacy_warm:8.2f} us/query")
+    print(f"legacy normalize_question (re cache cold) {legacy_cold_us:8.2f} us/query")
+    print(f"normalize_question (one compiled pattern) {normalize_us:8.2f} us/query")
+    print(f"analyze_query (tokens, stop words, stems) {analyze_us:8.2f} us/query")
+    print(f"analyze_query + typo correction ({len(vocabulary)} terms) {typo_us:8.2f} us/query")
+
+
+if __name__ == "__main__":
+    main()
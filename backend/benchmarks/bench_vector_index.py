@@ -0,0 +1,80 @@
+"""Build and query the TF-IDF vector index over a synthetic corpus.
+
+    cd backend && python benchmarks/bench_vector_index.py [passages]
+
+Defaults to 100k passages of ~120 Zipf-distributed words each.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.search_index import Passage, SearchHit
+from app.utils.vector_index import VectorIndex
+
+
+VOCABULARY_SIZE = 30000
+PASSAGE_WORDS = 120
+
+
+def synthetic_corpus(n, rng):
+    words = np.array([f"term{i}" for i in range(VOCABULARY_SIZE)])
+    ranks = np.minimum(rng.zipf(1.2, size=(n, PASSAGE_WORDS)), VOCABULARY_SIZE) - 1
+    for i in range(n):
+        yield i // 20, (i % 20) * 1000, (i % 20) * 1000 + 900, " ".join(words[ranks[i]])
+
+
+def timed(label, fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<44} {elapsed * 1000:10.2f} ms")
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = np.random.default_rng(42)
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = list(synthetic_corpus(n, rng))
+        index = VectorIndex(directory)
+
+        timed(f"build ({n} passages)", lambda: index.build(corpus))
+        size = os.path.getsize(os.path.join(directory, open(os.path.join(directory, "CURRENT")).read(), "vectors.npy"))
+        print(f"{'vectors.npy size':<44} {size / 2 ** 20:10.2f} MiB")
+
+        reader = VectorIndex(directory)
+        timed("first query (maps files)", lambda: reader.search(corpus[0][3][:200], 10))
+
+        picks = [int(i) for i in rng.integers(0, n, size=64)]
+        queries = [corpus[i][3][:200] for i in picks]
+        timed("single query, top 10", lambda: reader.search(queries[0], 10), repeat=20)
+
+        start = time.perf_counter()
+        batch = reader.search_batch(queries, 10)
+        elapsed = time.perf_counter() - start
+        print(f"{'batch of 64 queries, top 10':<44} {elapsed * 1000:10.2f} ms")
+        print(f"{'  per query in batch':<44} {elapsed * 1000 / len(queries):10.2f} ms")
+
+        hits = [
+            SearchHit(Passage(i, f, f, 1, s, e, text, 0, ()), float(50 - i))
+            for i, (f, s, e, text) in enumerate(corpus[:50])
+        ]
+        timed("rerank 50 keyword candidates", lambda: reader.rerank(queries[0], list(hits)), repeat=20)
+
+        # a passage's own opening words should find it again
+        found = sum(
+            1 for i, res in zip(picks, batch)
+            if any(r[:2] == corpus[i][:2] for r in res)
+        )
+        print(f"source passage in top 10 for its own prefix: {found}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Offline load test for /api/chat/ask using the fake LLM provider.
+
+Starts the app on a local threaded server against a throwaway SQLite
+database, loads synthetic notes and fires concurrent questions:
+
+    cd backend && python benchmarks/load_test_chat.py \\
+        --requests 400 --concurrency 32 --latency 0.8 --tokens-per-second 60
+
+--profile writes a cProfile dump of the request handlers to chat.prof
+(one profiler per request on its server thread, merged at the end).
+"""
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TOPICS = [
+    "photosynthesis", "mitochondria", "french revolution", "newton laws",
+    "integration by parts", "enzymes", "plate tectonics", "supply and demand",
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--notes", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--answer-tokens", type=int, default=120)
+    parser.add_argument("--profile", action="store_true")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(args.latency)
+    os.environ["FAKE_LLM_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["FAKE_LLM_ANSWER_TOKENS"] = str(args.answer_tokens)
+    os.environ.setdefault("AI_MAX_CONCURRENCY", str(args.concurrency))
+
+    from flask import g
+    from werkzeug.serving import make_server
+
+    from app import create_app
+    from app.extension import db
+    from app.models import File, FilePage, User
+    from app.utils.jwt_utils import create_access_token
+
+    app = create_app()
+    rng = random.Random(1)
+
+    with app.app_context():
+        db.create_all()
+        student = User(name="Load Student", email="load@example.com", role="student")
+        student.set_password("load-test-password")
+        db.session.add(student)
+        db.session.flush()
+
+        for n in range(args.notes):
+            topic = rng.choice(TOPICS)
+            body = " ".join(rng.choice(topic.split() + ["notes", "chapter", "example", "summary"])
+                            for _ in range(600))
+            # the passage index is built from extracted pages
+            words = body.split()
+            pages = [" ".join(words[i:i + 200]) for i in range(0, len(words), 200)]
+            db.session.add(File(filename=f"{topic.replace(' ', '_')}_{n}.pdf",
+                                storage_path="", size=0, uploaded_by=student.id,
+                                extraction_status="done",
+                                pages=[FilePage(page_number=p, text=text, char_count=len(text))
+                                       for p, text in enumerate(pages, start=1)]))
+        db.session.commit()
+        token = create_access_token({"sub": student.id, "role": "student"})
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    url = f"http://127.0.0.1:{server.server_port}/api/chat/ask"
+
+    # requests run on the server's threads, so a profiler enabled here
+    # would see none of them; profile each request where it runs instead
+    profiles = []
+    profiles_lock = threading.Lock()
+    if args.profile:
+        @app.before_request
+        def start_profile():
+            g._profiler = cProfile.Profile()
+            g._profiler.enable()
+
+        @app.teardown_request
+        def stop_profile(_):
+            profiler = g.pop("_profiler", None)
+            if profiler is not None:
+                profiler.disable()
+                with profiles_lock:
+                    profiles.append(profiler)
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def one(n):
+        question = f"explain {rng.choice(TOPICS)} part {n % 7}"
+        request = urllib.request.Request(
+            url,
+            data=json.dumps({"question": question}).encode(),
+            headers={"Content-Type": "application/json", "Authorization": f"Bearer {token}"},
+        )
+        start = time.perf_counter()
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status = response.status
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    if profiles:
+        pstats.Stats(*profiles).dump_stats("chat.prof")
+
+    latencies = sorted(r[0] for r in results)
+    errors = sum(1 for _, status in results if status != 200)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+
+    print(f"requests     {len(results)} ({errors} errors) at concurrency {args.concurrency}")
+    print(f"throughput   {len(results) / elapsed:.1f} req/s")
+    print(f"latency p50  {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"latency p95  {p95 * 1000:.1f} ms")
+    print(f"latency max  {latencies[-1] * 1000:.1f} ms")
+    if profiles:
+        print("profile      chat.prof (python -m pstats chat.prof)")
+
+
+if __name__ == "__main__":
+    main()
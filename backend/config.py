@@ -9,6 +9,24 @@ class Config:
 
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "uploads")
     MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", 50 * 1024 * 1024))
+    # downloads: "accel" hands the bytes to nginx with X-Accel-Redirect
+    # (internal location FILE_ACCEL_PREFIX aliased to the upload folder),
+    # "sendfile" sets X-Sendfile for Apache/lighttpd
+    FILE_SENDFILE_MODE = os.getenv("FILE_SENDFILE_MODE", "").lower() or None
+    FILE_ACCEL_PREFIX = os.getenv("FILE_ACCEL_PREFIX", "/protected-uploads/")
+    USE_X_SENDFILE = FILE_SENDFILE_MODE == "sendfile"
+
+    # plain-text notes served by /api/notes/search
+    NOTES_FOLDER = os.getenv("NOTES_FOLDER", "uploads")
+    NOTES_REFRESH_INTERVAL = float(os.getenv("NOTES_REFRESH_INTERVAL", 2))
+
+    # /api/files/upload/bulk: whole request (or ZIP contents) and file count
+    BULK_UPLOAD_MAX_SIZE = int(os.getenv("BULK_UPLOAD_MAX_SIZE", 500 * 1024 * 1024))
+    BULK_UPLOAD_MAX_FILES = int(os.getenv("BULK_UPLOAD_MAX_FILES", 200))
+
+    # resumable uploads: total file size, and idle time before cleanup
+    CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv("CHUNKED_UPLOAD_MAX_SIZE", 500 * 1024 * 1024))
+    UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", 24 * 3600))
 
     USE_S3 = os.getenv("USE_S3", "false").lower() in ("1", "true", "yes")
     S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
@@ -16,6 +34,95 @@ class Config:
     S3_SECRET_KEY = os.getenv("S3_SECRET_KEY")
     S3_BUCKET = os.getenv("S3_BUCKET")
     S3_REGION = os.getenv("S3_REGION", "us-east-1")
+    S3_KEY_PREFIX = os.getenv("S3_KEY_PREFIX", "notes/")
+    # "path" for MinIO and most local S3 stand-ins
+    S3_ADDRESSING_STYLE = os.getenv("S3_ADDRESSING_STYLE")
+    S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", 8 * 1024 * 1024))
+    S3_MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE", 8 * 1024 * 1024))
+    S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", 10))
+    # downloads redirect to a presigned URL valid this many seconds;
+    # set S3_PRESIGNED_DOWNLOADS=false to stream through the app instead
+    S3_PRESIGN_EXPIRES = int(os.getenv("S3_PRESIGN_EXPIRES", 300))
+    S3_PRESIGNED_DOWNLOADS = os.getenv("S3_PRESIGNED_DOWNLOADS", "true").lower() in ("1", "true", "yes")
 
     JWT_SECRET = os.getenv("JWT_SECRET", "jwt-secret")
     JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+    # Werkzeug method string, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000";
+    # stored hashes with other parameters are upgraded on the next login
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    # hashing runs in its own process pool; logins beyond workers + queue
+    # get a 503 with Retry-After. Each app worker (gunicorn -w N) starts
+    # its own pool, so N * PASSWORD_HASH_WORKERS processes hash in total:
+    # keep it small
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_MAX_QUEUED = int(os.getenv("PASSWORD_HASH_MAX_QUEUED", 32))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+    PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", 2))
+
+    # rough seconds one hash takes on the production box (scrypt ~0.14 s)
+    PASSWORD_HASH_SECONDS = float(os.getenv("PASSWORD_HASH_SECONDS", 0.14))
+
+    # rows hashed and inserted per transaction by the CSV user import
+    USER_IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE", 500))
+    # /api/auth/users/import hashes inside the request, so it only takes
+    # as many rows as the pool can hash in USER_IMPORT_REQUEST_SECONDS
+    # (kept well under gunicorn's 30 s worker timeout): ~200 rows with the
+    # defaults. Bigger files go through `flask users import --workers N`
+    USER_IMPORT_REQUEST_SECONDS = float(os.getenv("USER_IMPORT_REQUEST_SECONDS", 15))
+    USER_IMPORT_MAX_ROWS = int(os.getenv(
+        "USER_IMPORT_MAX_ROWS",
+        max(PASSWORD_HASH_WORKERS, 1) * USER_IMPORT_REQUEST_SECONDS / PASSWORD_HASH_SECONDS
+    ))
+
+    # verified tokens and user identities kept per process; role changes
+    # made through another worker show up within the TTL
+    AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", 60))
+    AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000))
+
+    # upstream LLM protection, per app worker: calls in flight, seconds a
+    # caller waits for a free slot, seconds before a call is cut off
+    AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", 8))
+    AI_QUEUE_TIMEOUT = float(os.getenv("AI_QUEUE_TIMEOUT", 30))
+    AI_CALL_TIMEOUT = float(os.getenv("AI_CALL_TIMEOUT", 60))
+
+    CHAT_CANDIDATE_PASSAGES = int(os.getenv("CHAT_CANDIDATE_PASSAGES", 20))
+    CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", 1200))
+
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 1000))
+    ANSWER_CACHE_MAX_BYTES = int(os.getenv("ANSWER_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+    ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", 3600))
+
+    CHAT_MEMORY_RAW_TURNS = int(os.getenv("CHAT_MEMORY_RAW_TURNS", 2))
+    CHAT_MEMORY_TURN_CHARS = int(os.getenv("CHAT_MEMORY_TURN_CHARS", 800))
+    CHAT_MEMORY_SUMMARY_CHARS = int(os.getenv("CHAT_MEMORY_SUMMARY_CHARS", 1500))
+
+    VECTOR_INDEX_DIR = os.getenv(
+        "VECTOR_INDEX_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "vector_index")
+    )
+    VECTOR_INDEX_DIMS = int(os.getenv("VECTOR_INDEX_DIMS", 256))
+    # seconds between checks of the CURRENT pointer for a newer build
+    VECTOR_INDEX_RELOAD_INTERVAL = float(os.getenv("VECTOR_INDEX_RELOAD_INTERVAL", 5))
+    CHAT_VECTOR_CANDIDATES = int(os.getenv("CHAT_VECTOR_CANDIDATES", 10))
+    CHAT_VECTOR_MIN_SIMILARITY = float(os.getenv("CHAT_VECTOR_MIN_SIMILARITY", 0.15))
+    CHAT_KEYWORD_WEIGHT = float(os.getenv("CHAT_KEYWORD_WEIGHT", 0.5))
+
+    PREVIEW_CACHE_DIR = os.getenv(
+        "PREVIEW_CACHE_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "previews")
+    )
+    PREVIEW_CACHE_MAX_BYTES = int(os.getenv("PREVIEW_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+    # requested widths round up to the nearest of these
+    PREVIEW_WIDTHS = [int(w) for w in os.getenv("PREVIEW_WIDTHS", "160,320,640,1024").split(",")]
+    PREVIEW_DEFAULT_WIDTH = int(os.getenv("PREVIEW_DEFAULT_WIDTH", 320))
+    PREVIEW_JPEG_QUALITY = int(os.getenv("PREVIEW_JPEG_QUALITY", 75))
+
+    CHAT_BATCH_MAX_QUESTIONS = int(os.getenv("CHAT_BATCH_MAX_QUESTIONS", 50))
+    CHAT_BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", 8))
+
+    # set to the core count on ingestion hosts; PDFs with at least
+    # PDF_PARALLEL_MIN_PAGES pages are split across all workers
+    EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", 2))
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 64))
+    EXTRACTION_MAX_ATTEMPTS = int(os.getenv("EXTRACTION_MAX_ATTEMPTS", 3))
+    EXTRACTION_RETRY_DELAY = float(os.getenv("EXTRACTION_RETRY_DELAY", 5))
@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# settings are read when config.py is imported, so set them first
+_tmp = tempfile.mkdtemp(prefix="nebulalearn-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["FAKE_LLM_LATENCY"] = "0"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["PREVIEW_CACHE_DIR"] = os.path.join(_tmp, "previews")
+os.environ["VECTOR_INDEX_DIR"] = os.path.join(_tmp, "vectors")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from app.extension import db  # noqa: E402
+from app.models import User  # noqa: E402
+from app.utils.answer_cache import answer_cache  # noqa: E402
+from app.utils.auth_cache import auth_cache  # noqa: E402
+from app.utils.extraction_queue import wait_for_idle  # noqa: E402
+from app.utils.jwt_utils import create_access_token  # noqa: E402
+from app.utils.search_index import passage_index  # noqa: E402
+from app.utils.storage import storage  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    app = create_app()
+    app.config.update(TESTING=True, UPLOAD_FOLDER=os.path.join(_tmp, "uploads"))
+    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+    storage.init_app(app)
+    return app
+
+
+@pytest.fixture(autouse=True)
+def database(app):
+    with app.app_context():
+        db.create_all()
+        yield db
+        wait_for_idle(30)
+        db.session.remove()
+        db.drop_all()
+    answer_cache.clear()
+    auth_cache.clear()
+    passage_index.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(name, role):
+    user = User(name=name, email=f"{name.lower()}@example.com", role=role)
+    user.set_password("password1")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def auth_headers(user):
+    return {"Authorization": "Bearer " + create_access_token({"sub": user.id, "role": user.role})}
+
+
+@pytest.fixture
+def teacher():
+    return make_user("Teacher", "teacher")
+
+
+@pytest.fixture
+def teacher_headers(teacher):
+    return auth_headers(teacher)
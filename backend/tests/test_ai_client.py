@@ -0,0 +1,30 @@
+import pytest
+
+from app.utils import ai_client, llm_providers
+from app.utils.llm_providers import LLMProvider
+
+
+def test_limits_come_from_app_config(app):
+    saved = {key: app.config[key] for key in ("AI_MAX_CONCURRENCY", "AI_QUEUE_TIMEOUT", "AI_CALL_TIMEOUT")}
+    app.config.update(AI_MAX_CONCURRENCY=3, AI_QUEUE_TIMEOUT=1.5, AI_CALL_TIMEOUT=7.0)
+    try:
+        ai_client.init_app(app)
+        assert ai_client.AI_QUEUE_TIMEOUT == 1.5
+        assert ai_client.AI_CALL_TIMEOUT == 7.0
+        assert llm_providers._call_timeout == 7.0
+        slots = [ai_client._acquire_slot() for _ in range(3)]
+        assert not ai_client._slots.acquire(blocking=False)
+        for held in slots:
+            held.release()
+    finally:
+        app.config.update(saved)
+        ai_client.init_app(app)
+
+
+def test_half_implemented_provider_fails_when_created():
+    class StreamOnly(LLMProvider):
+        def stream(self, prompt):
+            yield "answer"
+
+    with pytest.raises(TypeError):
+        StreamOnly()
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from app.extension import db
+from app.models import ChatHistory, File, FilePage
+from app.utils.answer_cache import answer_cache
+from app.utils.search_index import passage_index
+
+from conftest import auth_headers, make_user
+
+
+def add_note(teacher, filename, text):
+    note = File(filename=filename, storage_path="", size=0, uploaded_by=teacher.id,
+                extraction_status="done", extracted_at=datetime.utcnow(),
+                pages=[FilePage(page_number=1, text=text, char_count=len(text))])
+    db.session.add(note)
+    db.session.commit()
+    return note
+
+
+def add_turn(user, question, answer):
+    db.session.add(ChatHistory(user_id=user.id, question=question, answer=answer))
+    db.session.commit()
+
+
+def cache_answer_citing(file_id):
+    key = answer_cache.make_key("what is osmosis", [file_id])
+    answer_cache.put(key, {"answer": "water moves"})
+    return key
+
+
+def test_sync_drops_answers_for_files_deleted_by_another_worker(teacher):
+    note = add_note(teacher, "osmosis.txt", "osmosis moves water across membranes")
+    keep = add_note(teacher, "cells.txt", "cells have membranes")
+    passage_index.sync()
+    key = cache_answer_citing(note.id)
+    other_key = cache_answer_citing(keep.id)
+
+    # the delete is handled elsewhere: only the database changes here
+    FilePage.query.filter_by(file_id=note.id).delete()
+    db.session.delete(note)
+    db.session.commit()
+    passage_index.sync()
+
+    assert answer_cache.get(key) is None
+    assert answer_cache.get(other_key) is not None
+
+
+def test_sync_drops_answers_for_files_reextracted_by_another_worker(teacher):
+    note = add_note(teacher, "osmosis.txt", "osmosis moves water across membranes")
+    passage_index.sync()
+    key = cache_answer_citing(note.id)
+
+    note.pages[0].text = "osmosis is diffusion of water"
+    note.extracted_at = datetime.utcnow() + timedelta(seconds=1)
+    db.session.commit()
+    passage_index.sync()
+
+    assert answer_cache.get(key) is None
+
+
+def test_students_with_different_histories_share_an_answer(client, teacher):
+    add_note(teacher, "osmosis.txt", "osmosis moves water across membranes")
+    first = make_user("First", "student")
+    second = make_user("Second", "student")
+    add_turn(first, "what is a cell", "the unit of life")
+    add_turn(second, "what is diffusion", "particles spreading out")
+
+    r = client.post("/api/chat/ask", headers=auth_headers(first),
+                    json={"question": "what is osmosis"})
+    assert r.status_code == 200
+    hits = answer_cache.hits
+
+    r = client.post("/api/chat/ask", headers=auth_headers(second),
+                    json={"question": "what is osmosis"})
+    assert r.status_code == 200
+    assert answer_cache.hits == hits + 1
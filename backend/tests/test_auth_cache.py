@@ -0,0 +1,27 @@
+from app.models import File
+from app.extension import db
+from app.utils.auth_cache import auth_cache
+
+from conftest import auth_headers, make_user
+
+
+def test_each_request_resolves_its_own_caller(client, teacher, teacher_headers):
+    note = File(filename="notes.txt", storage_path="", size=0, uploaded_by=teacher.id)
+    db.session.add(note)
+    db.session.commit()
+    student = make_user("Student", "student")
+
+    # the test's app context outlives both requests
+    assert client.get("/api/auth/me", headers=auth_headers(student)).get_json()["role"] == "student"
+    r = client.delete(f"/api/files/{note.id}", headers=teacher_headers)
+
+    assert r.status_code == 200
+
+
+def test_token_claims_are_looked_up_once_per_request(client, teacher, teacher_headers):
+    hits, misses = auth_cache.hits, auth_cache.misses
+
+    assert client.get("/api/auth/me", headers=teacher_headers).status_code == 200
+
+    # one claims miss and one identity miss, no second claims lookup
+    assert (auth_cache.hits - hits, auth_cache.misses - misses) == (0, 2)
@@ -0,0 +1,56 @@
+import hashlib
+import os
+
+from app.extension import db
+from app.models import StoredBlob
+from app.utils import blob_store
+from app.utils.blob_store import acquire_blob, release_blob
+
+
+def temp_file(app, data):
+    path = os.path.join(app.config["UPLOAD_FOLDER"], f".{hashlib.md5(os.urandom(8)).hexdigest()}.part")
+    with open(path, "wb") as out:
+        out.write(data)
+    return hashlib.sha256(data).hexdigest(), path
+
+
+def test_lost_insert_race_keeps_rest_of_transaction(app, monkeypatch):
+    # another upload already stored (and committed) this content
+    c_hash, c_temp = temp_file(app, b"c")
+    winner = acquire_blob(c_hash, c_temp, "c.txt", 1)
+    db.session.commit()
+    c_path = winner.storage_path
+    db.session.expunge_all()
+
+    a_hash, a_temp = temp_file(app, b"a")
+    acquire_blob(a_hash, a_temp, "a.txt", 1)
+    _, a2_temp = temp_file(app, b"a")
+    acquire_blob(a_hash, a2_temp, "a2.txt", 1)
+    b_hash, b_temp = temp_file(app, b"b")
+    acquire_blob(b_hash, b_temp, "b.txt", 1)
+
+    # the existing row isn't visible yet when we look, so we try to insert
+    real_add_reference = blob_store._add_reference
+    calls = []
+
+    def racing_add_reference(content_hash):
+        calls.append(content_hash)
+        if len(calls) == 1:
+            return False
+        return real_add_reference(content_hash)
+
+    monkeypatch.setattr(blob_store, "_add_reference", racing_add_reference)
+    _, c2_temp = temp_file(app, b"c")
+    blob = acquire_blob(c_hash, c2_temp, "c2.txt", 1)
+    db.session.commit()
+
+    assert blob.storage_path == c_path
+    assert not os.path.exists(os.path.join(app.config["UPLOAD_FOLDER"], "c2.txt"))
+    assert db.session.get(StoredBlob, a_hash).ref_count == 2
+    assert db.session.get(StoredBlob, b_hash).ref_count == 1
+    assert db.session.get(StoredBlob, c_hash).ref_count == 2
+
+    # dropping one copy of "a" must leave its bytes for the other
+    assert release_blob(a_hash) is None
+    db.session.commit()
+    assert os.path.exists(db.session.get(StoredBlob, a_hash).storage_path)
@@ -0,0 +1,114 @@
+import hashlib
+import io
+import os
+import zipfile
+
+from app.extension import db
+from app.models import File, StoredBlob
+from app.routes import file_routes
+from app.utils import blob_store
+
+
+def zip_of(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_bulk_duplicates_and_concurrent_upload_keep_refcounts(client, teacher_headers, monkeypatch):
+    shared = b"shared lecture notes"
+    shared_hash = hashlib.sha256(shared).hexdigest()
+    other = b"other lecture notes"
+    other_hash = hashlib.sha256(other).hexdigest()
+
+    # an identical upload from another request lands while the bulk
+    # request is between its reference check and its insert
+    r = client.post("/api/files/upload", headers=teacher_headers,
+                    data={"file": (io.BytesIO(other), "single.txt")},
+                    content_type="multipart/form-data")
+    assert r.status_code == 201
+
+    real_add_reference = blob_store._add_reference
+    raced = []
+
+    def racing_add_reference(content_hash):
+        if content_hash == other_hash and not raced:
+            raced.append(content_hash)
+            return False
+        return real_add_reference(content_hash)
+
+    monkeypatch.setattr(blob_store, "_add_reference", racing_add_reference)
+
+    archive = zip_of({"a.txt": shared, "nested/a2.txt": shared, "b.txt": other})
+    r = client.post("/api/files/upload/bulk", headers=teacher_headers,
+                    data={"files": [(archive, "course.zip")]},
+                    content_type="multipart/form-data")
+    assert r.status_code == 201
+    results = {item["filename"]: item for item in r.get_json()["results"]}
+    assert all("id" in item for item in results.values())
+    assert raced == [other_hash]
+
+    db.session.expire_all()
+    assert db.session.get(StoredBlob, shared_hash).ref_count == 2
+    assert db.session.get(StoredBlob, other_hash).ref_count == 2
+    assert File.query.count() == 4
+
+    # deleting one copy keeps the bytes the other copy points at
+    r = client.delete(f"/api/files/{results['a.txt']['id']}", headers=teacher_headers)
+    assert r.status_code == 200
+    r = client.delete(f"/api/files/{results['b.txt']['id']}", headers=teacher_headers)
+    assert r.status_code == 200
+
+    db.session.expire_all()
+    for content_hash, data in ((shared_hash, shared), (other_hash, other)):
+        blob = db.session.get(StoredBlob, content_hash)
+        assert blob.ref_count == 1
+        with open(blob.storage_path, "rb") as f:
+            assert f.read() == data
+
+    r = client.get(f"/api/files/{results['a2.txt']['id']}/download", headers=teacher_headers)
+    assert r.status_code == 200
+    assert r.data == shared
+
+
+def test_bulk_entry_that_fails_after_acquiring_its_blob_gives_the_reference_back(
+        client, teacher_headers, monkeypatch):
+    existing = b"already stored notes"
+    existing_hash = hashlib.sha256(existing).hexdigest()
+    fresh = b"notes seen for the first time"
+    fresh_hash = hashlib.sha256(fresh).hexdigest()
+
+    r = client.post("/api/files/upload", headers=teacher_headers,
+                    data={"file": (io.BytesIO(existing), "single.txt")},
+                    content_type="multipart/form-data")
+    assert r.status_code == 201
+    stored_paths = set(os.listdir(client.application.config["UPLOAD_FOLDER"]))
+
+    real_cached_extraction = file_routes.cached_extraction
+
+    def failing_cached_extraction(content_hash):
+        if content_hash in (existing_hash, fresh_hash):
+            raise RuntimeError("extraction cache unavailable")
+        return real_cached_extraction(content_hash)
+
+    monkeypatch.setattr(file_routes, "cached_extraction", failing_cached_extraction)
+
+    r = client.post("/api/files/upload/bulk", headers=teacher_headers,
+                    data={"files": [(io.BytesIO(existing), "again.txt"),
+                                    (io.BytesIO(fresh), "fresh.txt"),
+                                    (io.BytesIO(b"fine"), "fine.txt")]},
+                    content_type="multipart/form-data")
+    assert r.status_code == 201
+    results = {item["filename"]: item for item in r.get_json()["results"]}
+    assert results["again.txt"]["error"] == "Could not store file"
+    assert results["fresh.txt"]["error"] == "Could not store file"
+    assert "id" in results["fine.txt"]
+
+    db.session.expire_all()
+    assert db.session.get(StoredBlob, existing_hash).ref_count == 1
+    assert db.session.get(StoredBlob, fresh_hash) is None
+    # only fine.txt added bytes to storage
+    assert len(set(os.listdir(client.application.config["UPLOAD_FOLDER"])) - stored_paths) == 1
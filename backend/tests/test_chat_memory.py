@@ -0,0 +1,44 @@
+import json
+from datetime import datetime, timedelta
+
+from app.extension import db
+from app.models import ChatHistory, ChatMemory
+
+from conftest import auth_headers, make_user
+
+
+def add_history(user, *exchanges):
+    start = datetime.utcnow() - timedelta(hours=1)
+    for n, (question, answer) in enumerate(exchanges):
+        db.session.add(ChatHistory(user_id=user.id, question=question, answer=answer,
+                                   created_at=start + timedelta(minutes=n)))
+    db.session.commit()
+
+
+def test_first_turn_keeps_history_of_user_without_memory_row(client):
+    student = make_user("Student", "student")
+    add_history(student, ("what is a cell", "the unit of life"),
+                ("what is osmosis", "water crossing a membrane"))
+
+    r = client.post("/api/chat/ask", headers=auth_headers(student),
+                    json={"question": "what is diffusion"})
+    assert r.status_code == 200
+
+    memory = db.session.get(ChatMemory, student.id)
+    turns = json.loads(memory.recent_turns)
+    assert [q for q, _ in turns] == ["what is osmosis", "what is diffusion"]
+    assert "what is a cell" in memory.summary
+
+
+def test_batch_seeds_memory_once(client):
+    student = make_user("Student", "student")
+    add_history(student, ("what is a cell", "the unit of life"))
+
+    r = client.post("/api/chat/ask-batch", headers=auth_headers(student),
+                    json={"questions": ["what is osmosis", "what is diffusion"]})
+    assert r.status_code == 200
+
+    memory = db.session.get(ChatMemory, student.id)
+    turns = json.loads(memory.recent_turns)
+    assert [q for q, _ in turns] == ["what is osmosis", "what is diffusion"]
+    assert memory.summary.count("what is a cell") == 1
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from app.models import ChatHistory
+from app.utils.answer_cache import answer_cache
+from app.utils.llm_providers import LLMProvider, get_provider, set_provider
+
+from conftest import auth_headers, make_user
+
+
+class FailingMidStream(LLMProvider):
+    def generate(self, prompt):
+        raise ConnectionError("upstream reset")
+
+    def stream(self, prompt):
+        yield "partial"
+        raise ConnectionError("upstream reset")
+
+
+@pytest.fixture
+def failing_provider():
+    previous = get_provider()
+    set_provider(FailingMidStream())
+    yield
+    set_provider(previous)
+
+
+def events(body):
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+
+def test_interrupted_stream_is_reported_not_cached_or_saved(client, failing_provider):
+    student = make_user("Student", "student")
+    r = client.post("/api/chat/ask/stream", headers=auth_headers(student),
+                    json={"question": "what is osmosis"})
+    received = events(r.get_data(as_text=True))
+
+    assert received[0] == ("token", {"text": "partial"})
+    assert received[-1][0] == "error"
+    assert received[-1][1]["partial"] is True
+    assert "done" not in [name for name, _ in received]
+
+    assert answer_cache.stats()["entries"] == 0
+    assert ChatHistory.query.count() == 0
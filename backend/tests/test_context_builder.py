@@ -0,0 +1,31 @@
+from app.utils.context_builder import build_context
+from app.utils.search_index import Passage, SearchHit
+
+
+DOCUMENT = "".join(f"word{n:03d} " for n in range(100))
+
+
+def hit(start, end, score, file_id=1):
+    return SearchHit(Passage(
+        id=start, file_id=file_id, filename="notes.txt", page=1,
+        start=start, end=end, text=DOCUMENT[start:end], length=0, terms=(),
+    ), score)
+
+
+def test_passage_bridging_two_spans_merges_into_one():
+    # two disjoint spans first, then a passage overlapping both
+    hits = [hit(0, 80, 3.0), hit(160, 240, 2.0), hit(60, 180, 1.0)]
+
+    context, passages = build_context(hits, token_budget=10_000)
+
+    assert [(p["start"], p["end"]) for p in passages] == [(0, 240)]
+    assert passages[0]["score"] == 3.0
+    assert context == "notes.txt (page 1):\n" + DOCUMENT[0:240]
+
+
+def test_separate_files_are_not_merged():
+    hits = [hit(0, 80, 2.0), hit(40, 120, 1.0, file_id=2)]
+
+    _, passages = build_context(hits, token_budget=10_000)
+
+    assert [(p["file_id"], p["start"], p["end"]) for p in passages] == [(1, 0, 80), (2, 40, 120)]
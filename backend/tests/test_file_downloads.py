@@ -0,0 +1,46 @@
+import hashlib
+import io
+
+from conftest import auth_headers, make_user
+
+CONTENT = bytes(range(256)) * 4
+
+
+def upload(client, headers):
+    r = client.post("/api/files/upload", headers=headers,
+                    data={"file": (io.BytesIO(CONTENT), "notes.bin")},
+                    content_type="multipart/form-data")
+    assert r.status_code == 201
+    return f"/api/files/{r.get_json()['id']}/download"
+
+
+def test_range_request_returns_partial_content(client, teacher_headers):
+    url = upload(client, teacher_headers)
+
+    r = client.get(url, headers={**teacher_headers, "Range": "bytes=100-199"})
+
+    assert r.status_code == 206
+    assert r.data == CONTENT[100:200]
+    assert r.headers["Content-Range"] == f"bytes 100-199/{len(CONTENT)}"
+    assert r.headers["Accept-Ranges"] == "bytes"
+
+
+def test_etag_is_the_content_hash_and_revalidates_with_304(client, teacher_headers):
+    url = upload(client, teacher_headers)
+
+    r = client.get(url, headers=teacher_headers)
+    assert r.status_code == 200
+    assert r.data == CONTENT
+    assert r.headers["ETag"] == '"%s"' % hashlib.sha256(CONTENT).hexdigest()
+    assert "private" in r.headers["Cache-Control"]
+
+    r = client.get(url, headers={**teacher_headers, "If-None-Match": r.headers["ETag"]})
+    assert r.status_code == 304
+    assert r.data == b""
+
+
+def test_another_teachers_file_is_forbidden(client, teacher_headers):
+    url = upload(client, teacher_headers)
+    other = make_user("Other", "teacher")
+
+    assert client.get(url, headers=auth_headers(other)).status_code == 403
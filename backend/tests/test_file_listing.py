@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extension import db
+from app.models import File
+
+
+def add_files(teacher, sizes):
+    start = datetime(2024, 1, 1)
+    files = [
+        File(filename=f"notes{n}.txt", storage_path="", size=size, uploaded_by=teacher.id,
+             uploaded_at=start + timedelta(minutes=n))
+        for n, size in enumerate(sizes)
+    ]
+    db.session.add_all(files)
+    db.session.commit()
+    return files
+
+
+def all_pages(client, headers, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, limit=2, **({"cursor": cursor} if cursor else {}))
+        r = client.get("/api/files/", headers=headers, query_string=query)
+        assert r.status_code == 200
+        ids += [f["id"] for f in r.get_json()]
+        pages += 1
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids, pages
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_size_cursor_walks_every_file_once_with_null_sizes_as_zero(client, teacher, teacher_headers, order):
+    # ties and NULLs on the sort column are broken by id
+    files = add_files(teacher, [300, None, 100, 0, 100, None, 200])
+
+    ids, pages = all_pages(client, teacher_headers, sort="size", order=order)
+
+    expected = sorted(files, key=lambda f: (f.size or 0, f.id), reverse=order == "desc")
+    assert ids == [f.id for f in expected]
+    assert pages == 4
+
+
+def test_cursor_from_another_sort_is_rejected(client, teacher, teacher_headers):
+    add_files(teacher, [1, 2, 3])
+    r = client.get("/api/files/", headers=teacher_headers, query_string={"limit": 1, "sort": "size"})
+    cursor = r.headers["X-Next-Cursor"]
+
+    r = client.get("/api/files/", headers=teacher_headers,
+                   query_string={"limit": 1, "sort": "filename", "cursor": cursor})
+    assert r.status_code == 400
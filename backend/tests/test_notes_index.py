@@ -0,0 +1,49 @@
+import os
+
+from app.utils.notes_index import NotesFolderIndex
+
+
+def write(folder, name, text, mtime_ns):
+    path = folder / name
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def files(index, question):
+    return [hit["file"] for hit in index.search(question)]
+
+
+def test_edits_deletes_and_new_notes_show_up_after_refresh(tmp_path):
+    write(tmp_path, "cells.txt", "mitochondria make energy for the cell", 1_000_000_000)
+    write(tmp_path, "water.txt", "osmosis moves water", 1_000_000_000)
+    index = NotesFolderIndex(str(tmp_path), refresh_interval=3600)
+
+    assert files(index, "mitochondria") == ["cells.txt"]
+    assert files(index, "ribosomes") == []
+
+    # same size, newer mtime: only the stat tells the edit apart
+    write(tmp_path, "cells.txt", "ribosomes make proteins for the cell!", 2_000_000_000)
+    (tmp_path / "water.txt").unlink()
+    write(tmp_path, "plants.txt", "plants use photosynthesis", 1_000_000_000)
+
+    # within the refresh interval the index is not re-read
+    assert files(index, "ribosomes") == []
+
+    index.refresh(force=True)
+    assert files(index, "ribosomes") == ["cells.txt"]
+    assert files(index, "mitochondria") == []
+    assert files(index, "osmosis") == []
+    assert files(index, "photosynthesis") == ["plants.txt"]
+
+
+def test_unchanged_notes_are_not_read_again(tmp_path, monkeypatch):
+    write(tmp_path, "cells.txt", "mitochondria make energy", 1_000_000_000)
+    index = NotesFolderIndex(str(tmp_path), refresh_interval=0)
+    index.refresh()
+
+    loaded = []
+    real_load = index._load
+    monkeypatch.setattr(index, "_load", lambda name, stat: loaded.append(name) or real_load(name, stat))
+
+    assert files(index, "mitochondria") == ["cells.txt"]
+    assert loaded == []
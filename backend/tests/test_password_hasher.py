@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+from werkzeug.security import check_password_hash
+
+from app.utils.password_hasher import HasherBusy, PasswordHasher
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(method="pbkdf2:sha256:200000", workers=1, max_queued=1, timeout=30)
+    yield hasher
+    if hasher._pool is not None:
+        hasher._pool.shutdown()
+
+
+def run_in_background(fn):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("value", fn()))
+    thread.start()
+    return thread, result
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_bulk_hashing_uses_backlog_slots_but_leaves_the_queue_to_logins(hasher):
+    passwords = [f"password{n}" for n in range(4)]
+    thread, result = run_in_background(lambda: hasher.hash_many(passwords))
+
+    # the bulk job holds its worker's slot; the queued slot stays free
+    wait_for(lambda: hasher._slots._value == 1)
+    assert check_password_hash(hasher.hash("login-password"), "login-password")
+
+    thread.join()
+    assert [check_password_hash(h, p) for h, p in zip(result["value"], passwords)] == [True] * 4
+    wait_for(lambda: hasher._slots._value == 2)
+
+
+def test_full_backlog_refuses_interactive_hashes(hasher):
+    hasher.max_queued = 0
+    hasher._slots = threading.BoundedSemaphore(1)
+    thread, _ = run_in_background(lambda: hasher.hash_many(["password1", "password2"]))
+
+    wait_for(lambda: hasher._slots._value == 0)
+    with pytest.raises(HasherBusy):
+        hasher.hash("login-password")
+    thread.join()
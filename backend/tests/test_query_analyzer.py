@@ -0,0 +1,40 @@
+from app.utils.query_analyzer import Vocabulary, analyze, analyze_query, normalize_question, stem
+
+
+def vocabulary(*terms):
+    vocab = Vocabulary()
+    for term in terms:
+        vocab.add(term)
+    return vocab
+
+
+def test_stemming_folds_common_inflections():
+    assert [stem(w) for w in ("studies", "classes", "running", "mixed", "cells", "virus")] == \
+        ["study", "class", "runn", "mix", "cell", "virus"]
+    assert analyze("The Mitochondria produced energies") == ["mitochondria", "produc", "energy"]
+
+
+def test_commands_and_stop_words_are_dropped():
+    assert normalize_question("Can you explain   photosynthesis?") == "photosynthesis?"
+    assert analyze_query("tell me about the membranes") == ["membrane"]
+
+
+def test_typos_are_corrected_against_the_vocabulary():
+    vocab = vocabulary("osmosis", "membrane", "mitochondria")
+
+    # substitution, deletion, insertion, transposition
+    assert analyze_query("osmozis", vocab) == ["osmosis"]
+    assert analyze_query("membrne", vocab) == ["membrane"]
+    assert analyze_query("mitochondrria", vocab) == ["mitochondria"]
+    assert analyze_query("memrbane", vocab) == ["membrane"]
+    # too far away or too short to correct
+    assert analyze_query("osmotic", vocab) == ["osmotic"]
+    assert analyze_query("cel", vocabulary("cell")) == ["cel"]
+
+
+def test_discarded_terms_stop_being_suggested():
+    vocab = vocabulary("osmosis", "osmosis")
+    vocab.discard("osmosis")
+    assert analyze_query("osmozis", vocab) == ["osmosis"]
+    vocab.discard("osmosis")
+    assert analyze_query("osmozis", vocab) == ["osmozis"]
@@ -0,0 +1,75 @@
+import threading
+from datetime import datetime
+
+from app.extension import db
+from app.models import File, FilePage
+from app.utils import search_index
+from app.utils.search_index import PassageIndex, passage_index
+
+
+def test_scoring_runs_outside_the_index_lock(monkeypatch):
+    index = PassageIndex()
+    index.add_file(1, "osmosis.txt", [(1, "osmosis moves water across membranes")])
+    real_scores = search_index.bm25_scores
+    free = []
+
+    def probe():
+        acquired = index._lock.acquire(timeout=1)
+        if acquired:
+            index._lock.release()
+        free.append(acquired)
+
+    def scores_while_probing(*args):
+        # another thread must be able to take the lock mid-scoring
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        return real_scores(*args)
+
+    monkeypatch.setattr(search_index, "bm25_scores", scores_while_probing)
+
+    assert [hit.passage.file_id for hit in index.search("osmosis")] == [1]
+    assert free == [True]
+
+
+def test_passage_at_finds_passages_by_start():
+    index = PassageIndex()
+    words = " ".join(f"word{n}" for n in range(200))
+    index.add_file(1, "long.txt", [(1, words), (2, "second page")])
+
+    starts = [start for file_id, start, _, _ in index.iter_passages()]
+    assert len(starts) == 3
+    for start in starts:
+        assert index.passage_at(1, start).start == start
+    assert index.passage_at(1, 1) is None
+    assert index.passage_at(2, 0) is None
+
+
+def test_bm25_ranks_denser_and_rarer_matches_first():
+    index = PassageIndex()
+    index.add_file(1, "water.txt", [(1, "osmosis osmosis osmosis moves water across membranes")])
+    index.add_file(2, "cells.txt", [(1, "cells and membranes; osmosis is mentioned once here "
+                                         "among many other words about cell biology topics")])
+    index.add_file(3, "plants.txt", [(1, "plants need water and light")])
+
+    assert [hit.passage.file_id for hit in index.search("osmosis", k=3)] == [1, 2]
+    # "membranes" appears in two passages, "plants" only in one
+    hits = index.search("membranes plants", k=3)
+    assert hits[0].passage.file_id == 3
+    assert hits[0].score > hits[1].score
+
+
+def test_deleted_file_leaves_search_and_sync(client, teacher, teacher_headers):
+    note = File(filename="week1.txt", storage_path="", size=0, uploaded_by=teacher.id,
+                extraction_status="done", extracted_at=datetime.utcnow(),
+                pages=[FilePage(page_number=1, text="osmosis moves water", char_count=19)])
+    db.session.add(note)
+    db.session.commit()
+    passage_index.sync()
+    assert [hit.passage.file_id for hit in passage_index.search("osmosis")] == [note.id]
+
+    assert client.delete(f"/api/files/{note.id}", headers=teacher_headers).status_code == 200
+
+    assert passage_index.search("osmosis") == []
+    passage_index.sync()
+    assert passage_index.search("osmosis") == []
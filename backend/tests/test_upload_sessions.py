@@ -0,0 +1,39 @@
+import io
+import os
+
+import pytest
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.extension import db
+from app.models import UploadSession
+from app.utils.upload_sessions import OffsetMismatch, _digests, append_chunk
+
+
+def test_stale_chunk_cannot_truncate_committed_bytes(client, teacher_headers):
+    data = os.urandom(1500)
+    r = client.post("/api/files/uploads", headers=teacher_headers,
+                    json={"filename": "notes.txt", "size": len(data), "mimetype": "text/plain"})
+    assert r.status_code == 201
+    upload_id = r.get_json()["upload_id"]
+
+    r = client.put(f"/api/files/uploads/{upload_id}?offset=0", headers=teacher_headers, data=data[:1000])
+    assert r.get_json()["offset"] == 1000
+
+    # a request that loaded the session before that chunk committed
+    stale = db.session.get(UploadSession, upload_id)
+    set_committed_value(stale, "received", 0)
+
+    with pytest.raises(OffsetMismatch) as excinfo:
+        append_chunk(stale, 0, io.BytesIO(b"x" * 300))
+    assert excinfo.value.expected == 1000
+    assert os.path.getsize(stale.temp_path) == 1000
+    # the running hash of the committed bytes survives the rejected request
+    assert _digests[upload_id][0] == 1000
+
+    r = client.put(f"/api/files/uploads/{upload_id}?offset=1000", headers=teacher_headers, data=data[1000:])
+    assert r.get_json()["offset"] == len(data)
+    r = client.post(f"/api/files/uploads/{upload_id}/finalize", headers=teacher_headers)
+    assert r.status_code == 201
+
+    r = client.get(f"/api/files/{r.get_json()['id']}/download", headers=teacher_headers)
+    assert r.data == data
@@ -0,0 +1,96 @@
+import io
+
+from app.models import User
+from app.utils import user_import
+from app.utils.password_hasher import password_hasher
+
+from conftest import auth_headers, make_user
+
+
+def csv_body(count, start=0):
+    rows = ["name,email,password"]
+    rows += [f"Student {n},student{n}@example.com,password{n:04d}" for n in range(start, start + count)]
+    return "\n".join(rows) + "\n"
+
+
+def post_csv(client, headers, body):
+    return client.post("/api/auth/users/import", headers=headers, data=body, content_type="text/csv")
+
+
+def test_http_import_refuses_oversize_files_before_committing(app, client):
+    admin = make_user("Admin", "admin")
+    max_rows = app.config["USER_IMPORT_MAX_ROWS"]
+    app.config["USER_IMPORT_MAX_ROWS"] = 5
+    try:
+        r = post_csv(client, auth_headers(admin), csv_body(6))
+    finally:
+        app.config["USER_IMPORT_MAX_ROWS"] = max_rows
+
+    assert r.status_code == 413
+    assert "flask users import" in r.get_json()["error"]
+    assert User.query.count() == 1
+
+
+def test_failed_batch_reports_exactly_what_was_committed(app, client, monkeypatch):
+    admin = make_user("Admin", "admin")
+    app.config["USER_IMPORT_BATCH_SIZE"] = 3
+    real_insert = user_import._insert_batch
+    batches = []
+
+    def failing_second_batch(batch, report):
+        batches.append(batch)
+        if len(batches) == 2:
+            raise RuntimeError("database went away")
+        return real_insert(batch, report)
+
+    monkeypatch.setattr(user_import, "_insert_batch", failing_second_batch)
+    try:
+        body = csv_body(3) + "Short,short@example.com,abc\n" + csv_body(5, start=3).split("\n", 1)[1]
+        r = post_csv(client, auth_headers(admin), body)
+    finally:
+        app.config["USER_IMPORT_BATCH_SIZE"] = 500
+
+    report = r.get_json()
+    assert r.status_code == 500
+    assert report["created"] == 3
+    # header is line 1, the first batch is lines 2-4, line 5 is invalid
+    assert report["aborted"] == {"row": 6, "error": "database went away"}
+    assert [e["row"] for e in report["errors"]] == [5]
+    assert User.query.count() == 4
+
+
+def test_cli_import_reports_partial_import(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(user_import, "_insert_batch", lambda batch, report: 1 / 0)
+    path = tmp_path / "cohort.csv"
+    path.write_text(csv_body(2))
+
+    result = app.test_cli_runner().invoke(args=["users", "import", str(path)])
+
+    assert result.exit_code != 0
+    assert "stopped at row 2" in result.output
+
+
+def test_default_http_cap_fits_the_worker_timeout(app):
+    config = app.config
+    seconds = config["USER_IMPORT_MAX_ROWS"] * config["PASSWORD_HASH_SECONDS"] \
+        / max(config["PASSWORD_HASH_WORKERS"], 1)
+    assert seconds <= 30
+
+
+def test_cli_import_workers_option_sizes_the_hash_pool(app, tmp_path, monkeypatch):
+    seen = []
+    monkeypatch.setattr(password_hasher, "hash_many", lambda passwords: (
+        seen.append(password_hasher.workers) or ["x" for _ in passwords]
+    ))
+    path = tmp_path / "cohort.csv"
+    path.write_text(csv_body(2))
+
+    workers = password_hasher.workers
+    try:
+        result = app.test_cli_runner().invoke(args=["users", "import", "--workers", "6", str(path)])
+    finally:
+        password_hasher.set_workers(workers)
+
+    assert result.exit_code == 0, result.output
+    assert seen == [6]
+    assert User.query.count() == 2
@@ -0,0 +1,40 @@
+import builtins
+
+from app.utils.vector_index import VectorIndex
+
+
+PASSAGES = [(1, 0, 30, "osmosis moves water across membranes"),
+            (2, 0, 20, "mitochondria make energy")]
+
+
+def test_current_pointer_is_not_read_on_every_query(tmp_path, monkeypatch):
+    index = VectorIndex(str(tmp_path), dims=32, reload_interval=60)
+    index.build(PASSAGES)
+    assert index.available
+
+    opened = []
+    real_open = builtins.open
+
+    def tracking_open(path, *args, **kwargs):
+        opened.append(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", tracking_open)
+
+    for _ in range(5):
+        assert index.available
+        index.search("osmosis")
+    assert opened == []
+
+
+def test_other_workers_pick_up_a_new_build_after_the_interval(tmp_path):
+    reader = VectorIndex(str(tmp_path), dims=32, reload_interval=60)
+    writer = VectorIndex(str(tmp_path), dims=32)
+    writer.build(PASSAGES[:1])
+    assert [r[0] for r in reader.search("mitochondria")] == []
+
+    writer.build(PASSAGES)
+    assert [r[0] for r in reader.search("mitochondria")] == []
+
+    reader._checked_at -= 60
+    assert [r[0] for r in reader.search("mitochondria")] == [2]
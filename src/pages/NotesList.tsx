@@ -14,28 +14,33 @@ interface Note {
 export default function NotesList() {
   const [notes, setNotes] = useState<Note[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const navigate = useNavigate();
 
+  // the API returns one page at a time; X-Next-Cursor points at the next
+  const fetchNotes = async (cursor?: string) => {
+    const token = localStorage.getItem("token");
+    if (!token) {
+      alert("Not authenticated");
+      return;
+    }
+    try {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const res = await fetch(`${API_URL}/api/files/${query}`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      if (!res.ok) throw new Error("Failed to fetch");
+      const data = await res.json();
+      setNotes((prev) => (cursor ? [...prev, ...data] : data));
+      setNextCursor(res.headers.get("X-Next-Cursor"));
+    } catch (err) {
+      console.error(err);
+    } finally {
+      setLoading(false);
+    }
+  };
+
   useEffect(() => {
-    const fetchNotes = async () => {
-      const token = localStorage.getItem("token");
-      if (!token) {
-        alert("Not authenticated");
-        return;
-      }
-      try {
-        const res = await fetch(`${API_URL}/api/files/`, {
-          headers: { Authorization: `Bearer ${token}` },
-        });
-        if (!res.ok) throw new Error("Failed to fetch");
-        const data = await res.json();
-        setNotes(data);
-      } catch (err) {
-        console.error(err);
-      } finally {
-        setLoading(false);
-      }
-    };
     fetchNotes();
   }, []);
 
@@ -144,6 +149,17 @@ export default function NotesList() {
             {notes.length === 0 && (
               <p className="text-center text-slate-500 py-10">No notes found in the archive.</p>
             )}
+
+            {nextCursor && (
+              <div className="flex justify-center pt-4">
+                <button
+                  onClick={() => fetchNotes(nextCursor)}
+                  className="bg-slate-800/80 border border-slate-700 hover:border-emerald-500/50 text-emerald-400 px-6 py-3 rounded-2xl font-bold transition-all"
+                >
+                  Load more
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>